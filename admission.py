@@ -0,0 +1,236 @@
+"""
+admission.py - Admission control for live guess searches.
+
+A live search can take hundreds of milliseconds of CPU. When many games need
+one at once (typically everyone's second guess under a strategy without a
+decision tree), unbounded searching starves every other route. GATE bounds
+how many searches run at once on the host; a turn that cannot get a slot
+within the queue deadline (counting any time spent waiting on a speculated
+or identical search) does not wait any longer but degrades: it scans the
+eval pool candidates-first for DEGRADED_BUDGET_MS, so at least one
+consistent candidate is scored, and plays the best guess found (SearchResult
+source 'degraded'). Degraded results are never cached or memoized.
+
+GATE is created when the app is imported, in memory shared with processes
+forked later, so under gunicorn's preload_app (see gunicorn.conf.py) all
+sync workers take slots from the master's one gate. Servers that import the
+app in each worker separately get one gate per worker; size ADMISSION_SLOTS
+for that.
+
+Background searches (speculation) wait for a slot instead of degrading.
+GET /solve, whose answers are cached for a year, must not degrade either,
+but waits only until the queue deadline and then answers 503 (Saturated).
+Outcomes (admitted, queued, expired, overloaded, degraded) are counted per
+process in metrics.ADMISSION, and for the whole gate with its state on
+GET /admin/stats.
+Configure with ADMISSION_SLOTS (0 disables the gate),
+ADMISSION_QUEUE_DEADLINE_MS and DEGRADED_BUDGET_MS.
+"""
+
+import atexit
+import fcntl
+import mmap
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+DEFAULT_SLOTS = os.cpu_count() or 1
+DEFAULT_QUEUE_DEADLINE_MS = 500
+
+DEGRADED_BUDGET_MS = int(os.environ.get('DEGRADED_BUDGET_MS', '20'))
+
+
+class Saturated(Exception):
+    """No slot freed up before the deadline of a search that must not degrade."""
+
+
+OUTCOMES = ('admitted', 'queued', 'expired', 'overloaded', 'degraded')
+
+# Shared int64 fields; the slot owners' PIDs follow them.
+_FIELDS = ('running', 'waiting') + OUTCOMES + ('max_wait_us',)
+_OWNERS = len(_FIELDS)
+
+
+def _shared_semaphore(slots):
+    """
+    A semaphore shared with processes forked after this call, or a
+    thread-only one where POSIX semaphores are unavailable (AWS Lambda,
+    and so Vercel, has no /dev/shm).
+    """
+    try:
+        import multiprocessing
+
+        return multiprocessing.BoundedSemaphore(slots)
+    except (ImportError, OSError):
+        return threading.BoundedSemaphore(slots)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class SolverGate:
+    """
+    Counting semaphore for searches that tracks its queue: acquire() admits
+    a caller, or gives up after a timeout ('expired') or at once when
+    'max_queue' callers are already waiting ('overloaded').
+
+    The slots, queue and counts live in memory shared with every process
+    forked after the gate is created, so a gate made in a pre-forking
+    server's master bounds searches across all its workers. A worker that
+    dies holding a slot has it reclaimed the next time the gate is full.
+    The shared state is guarded by flock() on its backing file, which the
+    kernel drops when a worker is killed, so a worker killed mid-update
+    cannot lock out the others.
+    """
+
+    def __init__(self, slots=DEFAULT_SLOTS, queue_deadline_ms=DEFAULT_QUEUE_DEADLINE_MS, max_queue=None):
+        self.slots = slots
+        self.queue_deadline_ms = queue_deadline_ms
+        self.max_queue = max_queue
+        self._semaphore = _shared_semaphore(slots)
+        fd, self._path = tempfile.mkstemp(prefix='bulls_cows_admission_')
+        size = 8 * (_OWNERS + slots)
+        os.ftruncate(fd, size)
+        # A MAP_SHARED file mapping, so forked children write to the same pages.
+        self._shared = memoryview(mmap.mmap(fd, size)).cast('q')
+        self._fd, self._thread_lock = fd, threading.Lock()
+        self._creator = os.getpid()
+        os.register_at_fork(after_in_child=self._after_fork)
+        atexit.register(self._remove)
+
+    def _after_fork(self):
+        # flock() belongs to the open file, which a fork shares: open our own.
+        self._fd, self._thread_lock = os.open(self._path, os.O_RDWR), threading.Lock()
+
+    def _remove(self):
+        """Delete the backing file when the process that created the gate exits."""
+        if os.getpid() == self._creator and os.path.exists(self._path):
+            os.unlink(self._path)
+
+    @classmethod
+    def from_env(cls):
+        """Gate configured from the ADMISSION_* environment variables, or None if disabled."""
+        slots = int(os.environ.get('ADMISSION_SLOTS', DEFAULT_SLOTS))
+        if slots <= 0:
+            return None
+        return cls(slots, int(os.environ.get('ADMISSION_QUEUE_DEADLINE_MS', DEFAULT_QUEUE_DEADLINE_MS)))
+
+    @contextmanager
+    def _lock(self):
+        """Exclusive access to the shared state, across threads and processes."""
+        with self._thread_lock:   # threads share this process's open file, so flock() alone does not exclude them
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _add(self, field, n=1):
+        """Adjust a shared field. Caller holds the lock."""
+        self._shared[_FIELDS.index(field)] += n
+
+    def _count(self, outcome):
+        """Record an outcome. Caller holds the lock."""
+        self._add(outcome)
+        metrics.ADMISSION.inc(outcome)
+
+    def _set_owner(self, old, new):
+        """Replace the first slot owner PID equal to 'old' with 'new'. Caller holds the lock."""
+        for i in range(_OWNERS, _OWNERS + self.slots):
+            if self._shared[i] == old:
+                self._shared[i] = new
+                return
+
+    def _admit(self, outcome):
+        with self._lock():
+            self._add('running')
+            self._set_owner(0, os.getpid())
+            self._count(outcome)
+        return outcome
+
+    def _reclaim(self):
+        """Free the slots of processes that died while holding them."""
+        with self._lock():
+            dead = [i for i in range(_OWNERS, _OWNERS + self.slots) if self._shared[i] and not _alive(self._shared[i])]
+            for i in dead:
+                self._shared[i] = 0
+                self._add('running', -1)
+        for _ in dead:
+            self._semaphore.release()
+
+    def acquire(self, timeout=None):
+        """
+        Take a slot, waiting at most 'timeout' seconds (None: forever).
+        Returns 'admitted', 'queued' (admitted after waiting), 'expired' or
+        'overloaded'; only the first two hold a slot to release().
+        """
+        if self._semaphore.acquire(False):
+            return self._admit('admitted')
+        self._reclaim()
+
+        with self._lock():
+            if self.max_queue is not None and self._shared[_FIELDS.index('waiting')] >= self.max_queue:
+                self._count('overloaded')
+                return 'overloaded'
+            self._add('waiting')
+        start = time.monotonic()
+        acquired = False
+        try:
+            acquired = self._semaphore.acquire(True, timeout)
+        finally:
+            with self._lock():
+                self._add('waiting', -1)
+                wait_us = int((time.monotonic() - start) * 1e6)
+                max_wait = _FIELDS.index('max_wait_us')
+                self._shared[max_wait] = max(self._shared[max_wait], wait_us)
+                if not acquired:
+                    self._count('expired')
+        return self._admit('queued') if acquired else 'expired'
+
+    def release(self):
+        with self._lock():
+            self._add('running', -1)
+            self._set_owner(os.getpid(), 0)
+        self._semaphore.release()
+
+    def record_degraded(self):
+        """Count a decision made by the cheap fallback after acquire() failed."""
+        with self._lock():
+            self._count('degraded')
+
+    def stats(self):
+        """Snapshot of the gate's configuration, state and outcome counts (across processes)."""
+        with self._lock():
+            fields = dict(zip(_FIELDS, self._shared[:_OWNERS]))
+        return {
+            'slots': self.slots,
+            'queue_deadline_ms': self.queue_deadline_ms,
+            'running': fields['running'],
+            'waiting': fields['waiting'],
+            **{outcome: fields[outcome] for outcome in OUTCOMES},
+            'max_wait_ms': round(fields['max_wait_us'] / 1000, 1),
+        }
+
+
+GATE = SolverGate.from_env()
+
+
+def turn_deadline():
+    """The time.monotonic() by which a turn starting now must have a slot, or None without a gate."""
+    return None if GATE is None else time.monotonic() + GATE.queue_deadline_ms / 1000
+
+
+def remaining(deadline):
+    """Seconds left until 'deadline' (at least 0), or None for no deadline."""
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
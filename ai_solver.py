@@ -10,10 +10,93 @@ Key design:
 - The human THINKS of a number; it is NEVER stored on the server.
 - The AI learns purely from the honest feedback the human provides.
 - No cheating: the AI cannot verify feedback against any stored secret.
+- Codes are handled as code_space indices (0..5039) throughout; the Flask
+  layer converts them to strings for display.
+- How a guess is scored is chosen per game from the strategies registry
+  (minimax by default); all strategies share one partition-histogram pass.
+- When NumPy is installed, filtering and partition scoring run as array
+  operations over the feedback table; otherwise the pure-Python loops are
+  used. Set AI_SOLVER_BACKEND=python to force the fallback. NumPy (and the
+  process pool machinery) are imported on first use, so a process that only
+  serves tree and opening-book answers never loads them.
+- With AI_SOLVER_PROCESSES set, large pure-Python scans are split across a
+  per-process worker pool; the result matches the serial scan.
+- Searches can be given a millisecond budget: the eval pool is scanned
+  candidates-first and the best guess found when time runs out is returned.
 """
 
-from itertools import permutations
-from game_logic import calculate_bulls_and_cows
+import os
+import time
+from array import array
+from collections import namedtuple
+from functools import lru_cache
+from importlib.util import find_spec
+
+import admission
+import candidate_sets
+import decision_tree
+import guess_cache
+import guess_memo
+import metrics
+import opening_book
+import solver_client
+from code_space import CODES, NUM_CODES, ALL_INDICES, DIGITS, DIGIT_MASKS, as_index
+from feedback_table import NUM_FEEDBACKS, encode_feedback, feedback_row, get_array
+from strategies import DEFAULT_STRATEGY, get_strategy
+
+# NumPy is optional; it is imported by _numpy() the first time it is needed.
+np = None
+
+USE_NUMPY = find_spec('numpy') is not None and os.environ.get('AI_SOLVER_BACKEND', 'numpy') != 'python'
+
+# Rows of the feedback table scored per bincount call in the NumPy path;
+# smaller chunks under a time budget so the deadline is checked more often.
+_NUMPY_CHUNK = 512
+_NUMPY_DEADLINE_CHUNK = 64
+
+# Opt-in multi-core scoring for the pure-Python path: number of worker
+# processes (0 = serial), used once candidates x eval pool reaches
+# PARALLEL_MIN_WORK partition lookups.
+PARALLEL_PROCESSES = int(os.environ.get('AI_SOLVER_PROCESSES', '0'))
+PARALLEL_MIN_WORK = int(os.environ.get('AI_SOLVER_PARALLEL_MIN_WORK', '200000'))
+
+_executor = None
+_executor_pid = None
+
+OPENER = as_index('0123')
+
+# Bump whenever a change can alter the guess chosen for some history (opener,
+# tie-breaks, strategy scoring): cached answers keyed on it become stale.
+SOLVER_VERSION = 1
+
+
+def _numpy():
+    """Import NumPy on first use and return the module."""
+    global np
+    if np is None:
+        import numpy
+
+        np = numpy
+    return np
+
+# Outcome of a guess search. 'source' is 'opener', 'tree', 'book',
+# 'endgame', 'search', 'cache' (another request's search, see guess_cache),
+# 'memo' (a search persisted by guess_memo) or 'degraded' (a short scan made
+# because no search slot was free, see admission); 'evaluated' of
+# 'pool_size' guesses were scored; 'complete' is False when a time budget
+# cut the scan short. For minimax in the Python
+# loop, 'pruned' counts evaluations abandoned once they could no longer beat
+# the best guess, and 'skipped' the guesses never scored because the best
+# guess already met the lower bound.
+SearchResult = namedtuple(
+    'SearchResult',
+    ['guess', 'source', 'evaluated', 'pool_size', 'complete', 'pruned', 'skipped'],
+    defaults=(0, 0),
+)
+
+# Distinct feedbacks a candidate guess can receive (a non-candidate cannot
+# receive 4 bulls, so it has one fewer).
+_FEEDBACK_CLASSES = 14
 
 
 def generate_all_combinations():
@@ -22,107 +105,456 @@ def generate_all_combinations():
     Leading zeros are allowed (e.g., '0123' is valid).
     Returns a list of strings.
     """
-    return [''.join(p) for p in permutations('0123456789', 4)]
+    return list(CODES)
 
 
 def filter_candidates(candidates, guess, bulls, cows):
     """
-    Keep only candidates that would produce the same (bulls, cows) result
-    if 'guess' were applied to them as the secret.
+    Keep only candidates (code indices) that would produce the same
+    (bulls, cows) result if 'guess' (a code index) were applied to them
+    as the secret.
+
+    'candidates' may also be a candidate_sets bitset (int); the result is
+    then a bitset too, computed with a single '&'.
     """
-    filtered = []
-    for candidate in candidates:
-        b, c = calculate_bulls_and_cows(candidate, guess)
-        if b == bulls and c == cows:
-            filtered.append(candidate)
-    return filtered
+    if isinstance(candidates, int):
+        return candidates & candidate_sets.consistent_with(guess, bulls, cows)
+
+    target = encode_feedback(bulls, cows)
+    if USE_NUMPY:
+        np = _numpy()
+        candidates = np.asarray(candidates, dtype=np.intp)
+        return candidates[get_array()[guess, candidates] == target].tolist()
+
+    row = feedback_row(guess)
+    return [candidate for candidate in candidates if row[candidate] == target]
 
 
 def get_candidates_from_history(history):
-    """Rebuild the candidate list by replaying all prior guesses + feedback."""
-    candidates = generate_all_combinations()
-    for entry in history:
-        candidates = filter_candidates(candidates, entry['guess'], entry['bulls'], entry['cows'])
-    return candidates
+    """Rebuild the candidate index list by replaying all prior guesses + feedback."""
+    return candidate_sets.to_indices(candidate_sets.from_history(history))
 
 
-def get_next_guess(candidates, guessed_set):
+def get_next_guess(candidates, guessed_set, strategy=DEFAULT_STRATEGY):
     """
-    Choose the next best guess.
+    Choose the next best guess. 'candidates' is a list of code indices and
+    'guessed_set' the set of indices already played; returns a code index.
 
     Strategy:
     - First guess: '0123' — a strong opener that probes 4 distinct digits.
-    - Subsequent guesses: use a minimax-style pick.
+    - Subsequent guesses: pick the guess whose partition histogram scores
+      best under 'strategy' (a strategies registry name; minimax by default).
     """
-    OPENER = '0123'
+    return search_next_guess(candidates, guessed_set, strategy).guess
+
+
+def search_next_guess(candidates, guessed_set, strategy=DEFAULT_STRATEGY, budget_ms=None):
+    """
+    get_next_guess with a time budget and search metadata. With 'budget_ms'
+    set, the eval pool (current candidates first, then every other code) is
+    scanned until the deadline and the best guess found so far is returned;
+    at least one guess is always scored. Returns a SearchResult.
+    """
+    scorer = get_strategy(strategy)
 
     if not guessed_set:
-        return OPENER
+        return SearchResult(OPENER, 'opener', 0, 0, True)
 
     unguessed_candidates = [c for c in candidates if c not in guessed_set]
     if len(candidates) <= 2:
-        return unguessed_candidates[0] if unguessed_candidates else candidates[0]
+        guess = unguessed_candidates[0] if unguessed_candidates else candidates[0]
+        return SearchResult(guess, 'endgame', 0, 0, True)
+
+    deadline = time.perf_counter() + budget_ms / 1000 if budget_ms else None
+    candidate_set = set(candidates)
+
+    eval_pool = list(candidates) + [c for c in ALL_INDICES if c not in candidate_set]
+    eval_pool = symmetry_representatives(eval_pool, guessed_set)
 
-    all_combos = generate_all_combinations()
+    if USE_NUMPY:
+        guess, evaluated = _best_guess_numpy(candidates, eval_pool, scorer, deadline)
+        return SearchResult(guess, 'search', evaluated, len(eval_pool), evaluated == len(eval_pool))
+
+    if PARALLEL_PROCESSES and len(candidates) * len(eval_pool) >= PARALLEL_MIN_WORK:
+        scan = _scan_parallel(candidates, eval_pool, scorer.name, budget_ms)
+    else:
+        scan = _scan_pool(candidates, eval_pool, scorer, deadline)
+
+    best_guess = scan.guess
+    if best_guess is None:
+        best_guess = unguessed_candidates[0] if unguessed_candidates else candidates[0]
+    return SearchResult(
+        best_guess, 'search', scan.evaluated, len(eval_pool), scan.complete, scan.pruned, scan.skipped,
+    )
+
+
+# Result of scanning (part of) an eval pool: the best guess, its score and
+# its position in the scanned pool, plus the counters for SearchResult.
+_Scan = namedtuple('_Scan', ['guess', 'score', 'position', 'evaluated', 'pruned', 'skipped', 'complete'])
+
+
+def _scan_pool(candidates, eval_pool, scorer, deadline=None):
+    """
+    Pure-Python scoring loop: the first guess in eval_pool order with the
+    lowest (strategy score, candidate membership). Returns a _Scan.
+    """
     best_guess = None
     best_score = float('inf')
+    best_position = None
     candidate_set = set(candidates)
-    
-    eval_pool = list(candidates) + [c for c in all_combos if c not in candidate_set]
 
-    for guess in eval_pool:
-        if guess in guessed_set:
-            continue
+    # Branch and bound (minimax only): no guess can have a worst case below
+    # ceil(k / classes), and a guess is abandoned as soon as one bucket
+    # grows past what could still beat best_score.
+    bounded = scorer.name == 'minimax'
+    lower_bound = {
+        0: -(-len(candidates) // _FEEDBACK_CLASSES),
+        1: -(-len(candidates) // (_FEEDBACK_CLASSES - 1)),
+    }
+    evaluated = pruned = skipped = 0
+    complete = True
+    for position, guess in enumerate(eval_pool):
+        in_candidates = guess in candidate_set
+        membership = 0 if in_candidates else 1
+        if bounded and best_guess is not None and best_score <= (lower_bound[membership], membership):
+            # eval_pool lists candidates first, so nothing after this can win.
+            skipped = len(eval_pool) - position
+            break
+        if deadline is not None and evaluated and time.perf_counter() >= deadline:
+            complete = False
+            break
+        evaluated += 1
 
-        partitions = {}
-        for secret in candidates:
-            result = calculate_bulls_and_cows(secret, guess)
-            partitions[result] = partitions.get(result, 0) + 1
+        row = feedback_row(guess)
+        partitions = [0] * NUM_FEEDBACKS
+        if bounded and best_guess is not None:
+            # Largest bucket size that still lets this guess beat best_score.
+            limit = best_score[0] if membership < best_score[1] else best_score[0] - 1
+            abandoned = False
+            for secret in candidates:
+                fb = row[secret]
+                partitions[fb] += 1
+                if partitions[fb] > limit:
+                    abandoned = True
+                    break
+            if abandoned:
+                pruned += 1
+                continue
+        else:
+            for secret in candidates:
+                partitions[row[secret]] += 1
 
-        worst = max(partitions.values()) if partitions else float('inf')
-        in_candidates = guess in candidate_set
+        # Strategy score (e.g. worst case), tie-break by candidate membership
+        current_score = (scorer.score(partitions), membership)
 
-        # Simple score: prefer smaller worst-case, tie-break by candidate membership
-        current_score = (worst, 0 if in_candidates else 1)
-        
         # Initialize or compare properly
-        if best_guess is None:
-            best_guess = guess
-            best_score = current_score
-        elif current_score < best_score:
+        if best_guess is None or current_score < best_score:
             best_guess = guess
             best_score = current_score
+            best_position = position
+
+    return _Scan(best_guess, best_score, best_position, evaluated, pruned, skipped, complete)
+
+
+def _scan_chunk(candidate_bits, eval_pool, strategy, budget_ms):
+    """Process-pool task: _scan_pool over one slice of the eval pool."""
+    deadline = time.perf_counter() + budget_ms / 1000 if budget_ms else None
+    return _scan_pool(candidate_sets.to_indices(candidate_bits), eval_pool, get_strategy(strategy), deadline)
+
+
+def _scan_parallel(candidates, eval_pool, strategy, budget_ms=None):
+    """
+    Score eval_pool across the process pool and reduce the partial bests.
+
+    Worker i scans eval_pool[i::n], which keeps the candidates-first order
+    inside every slice. Each slice reports its first best guess; taking the
+    minimum of (score, position in eval_pool) reproduces the serial pick.
+    Candidates travel as a 630-byte bitset; the feedback table itself is a
+    shared read-only memory map in every worker.
+    """
+    executor = _get_executor()
+    workers = PARALLEL_PROCESSES
+    candidate_bits = candidate_sets.from_indices(candidates)
+    futures = [
+        executor.submit(_scan_chunk, candidate_bits, eval_pool[i::workers], strategy, budget_ms)
+        for i in range(workers)
+    ]
+    scans = [future.result() for future in futures]
+
+    best = None
+    for i, scan in enumerate(scans):
+        if scan.guess is None:
+            continue
+        key = (scan.score, i + scan.position * workers)
+        if best is None or key < best[0]:
+            best = (key, scan.guess)
+    return _Scan(
+        best[1] if best else None, best[0][0] if best else None, best[0][1] if best else None,
+        sum(s.evaluated for s in scans), sum(s.pruned for s in scans),
+        sum(s.skipped for s in scans), all(s.complete for s in scans),
+    )
+
+
+def _get_executor():
+    """The process pool for parallel scans, created once per worker process."""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        from concurrent.futures import ProcessPoolExecutor
+
+        _executor = ProcessPoolExecutor(max_workers=PARALLEL_PROCESSES)
+        _executor_pid = os.getpid()
+    return _executor
+
+
+@lru_cache(maxsize=256)
+def _symmetry_classes(used_mask):
+    """
+    Class key of every code under permutations of the digits NOT in
+    'used_mask': used digits stay as they are, free digits collapse to 10.
+    Keys are below 11 ** 4, so they are packed into a uint16 array (10 KB
+    per mask rather than 5040 int objects).
+    """
+    return array('H', (
+        sum((d if used_mask >> d & 1 else 10) * 11 ** pos for pos, d in enumerate(digits))
+        for digits in DIGITS
+    ))
+
+
+def symmetry_representatives(eval_pool, guessed_set):
+    """
+    Reduce 'eval_pool' to one guess per symmetry class, dropping guessed codes.
+
+    A permutation of the digits that fixes every digit used in the history
+    maps the candidate set onto itself, so all guesses related by it have the
+    same partition sizes and the same candidate membership. The first member
+    of each class in eval_pool order is kept, which is exactly the guess a
+    full scan would settle on, so results are unchanged.
+    """
+    used_mask = 0
+    for guess in guessed_set:
+        used_mask |= DIGIT_MASKS[guess]
+    classes = _symmetry_classes(used_mask)
+
+    seen = set()
+    representatives = []
+    for guess in eval_pool:
+        key = classes[guess]
+        if key not in seen and guess not in guessed_set:
+            seen.add(key)
+            representatives.append(guess)
+    return representatives
+
+
+def _partition_sizes(candidates, guesses):
+    """
+    Partition histograms of 'candidates' for each guess in 'guesses', as a
+    (len(guesses), 25) array: entry [i, f] counts candidates giving feedback
+    f to guesses[i].
+    """
+    np = _numpy()
+    table = get_array()
+    candidates = np.asarray(candidates, dtype=np.intp)
+    guesses = np.asarray(guesses, dtype=np.intp)
+    sizes = np.empty((len(guesses), NUM_FEEDBACKS), dtype=np.int64)
+    for start in range(0, len(guesses), _NUMPY_CHUNK):
+        rows = guesses[start:start + _NUMPY_CHUNK]
+        block = table[np.ix_(rows, candidates)].astype(np.int32)
+        block += (np.arange(len(rows), dtype=np.int32) * NUM_FEEDBACKS)[:, None]
+        counts = np.bincount(block.ravel(), minlength=len(rows) * NUM_FEEDBACKS)
+        sizes[start:start + len(rows)] = counts.reshape(len(rows), NUM_FEEDBACKS)
+    return sizes
+
+
+def _best_guess_numpy(candidates, eval_pool, scorer, deadline=None):
+    """
+    NumPy counterpart of the scoring loop in search_next_guess. Scores the
+    eval_pool a chunk at a time (stopping at 'deadline', if given) and applies
+    the same ordering and tie-breaks: best strategy score, then candidate
+    membership, then eval_pool order. Returns (guess, evaluated).
+    """
+    np = _numpy()
+    chunk = _NUMPY_CHUNK if deadline is None else _NUMPY_DEADLINE_CHUNK
+    chunks = []
+    evaluated = 0
+    while evaluated < len(eval_pool):
+        if deadline is not None and evaluated and time.perf_counter() >= deadline:
+            break
+        rows = eval_pool[evaluated:evaluated + chunk]
+        chunks.append(scorer.score_rows(_partition_sizes(candidates, rows)))
+        evaluated += len(rows)
+    scores = np.concatenate(chunks)
+
+    in_candidates = np.zeros(NUM_CODES, dtype=bool)
+    in_candidates[candidates] = True
+    tied = scores == scores.min()
+    preferred = tied & in_candidates[eval_pool[:evaluated]]
+    return eval_pool[int(np.argmax(preferred if preferred.any() else tied))], evaluated
 
-    return best_guess if best_guess else (unguessed_candidates[0] if unguessed_candidates else candidates[0])
 
 class AIBrainHard:
     """
     Stateful AI solver for hard-mode Bulls or Cows.
-    State stored as plain dicts/lists for Flask session serialization.
-    The AI never knows the human's secret — it only uses feedback.
+    State stored as plain dicts/lists for Flask session serialization, with
+    guesses as code indices. The AI never knows the human's secret — it only uses feedback.
+
+    The state carries the current candidate set as a base64 bitset
+    (see candidate_sets), so each feedback costs a single filter step.
+    States from before the bitset was added only hold 'guessed'; they are
+    migrated by replaying that history the first time they are read.
     """
 
     @staticmethod
-    def initial_state():
-        """Return a fresh solver state dict."""
+    def initial_state(strategy=DEFAULT_STRATEGY):
+        """Return a fresh solver state dict using the named guess strategy."""
+        get_strategy(strategy)
         return {
             'guessed': [],          # list of {guess, bulls, cows}
             'current_guess': None,  # pending guess awaiting feedback
+            'candidates': candidate_sets.encode(candidate_sets.FULL),
+            'strategy': strategy,
         }
 
     @staticmethod
-    def make_guess(state):
+    def candidate_bits(state):
+        """Return the current candidate bitset, migrating old states in place."""
+        if 'candidates' not in state:
+            bits = candidate_sets.from_history(state.get('guessed', []))
+            state['candidates'] = candidate_sets.encode(bits)
+            return bits
+        return candidate_sets.decode(state['candidates'])
+
+    @staticmethod
+    def candidates(state):
+        """Return the current candidate indices."""
+        return candidate_sets.to_indices(AIBrainHard.candidate_bits(state))
+
+    @staticmethod
+    def candidate_count(state):
+        """Number of codes still consistent with all feedback so far."""
+        return candidate_sets.count(AIBrainHard.candidate_bits(state))
+
+    @staticmethod
+    def make_guess(state, budget_ms=None):
         """
         Choose next guess using minimax elimination, record it, return it.
-        Returns (guess_string, updated_state).
+        Returns (guess_index, updated_state).
+        """
+        result, state = AIBrainHard.make_guess_detailed(state, budget_ms)
+        return result.guess, state
+
+    @staticmethod
+    def make_guess_detailed(state, budget_ms=None, result=None, deadline=None):
+        """
+        make_guess, returning the full SearchResult instead of just the guess.
+        'result' may carry a choose_guess() result computed ahead of time
+        for this same state (see speculation); otherwise it is computed here,
+        with 'deadline' as in choose_guess().
+        Returns (search_result, updated_state).
         """
+        if result is None:
+            result = AIBrainHard.choose_guess(state, budget_ms, deadline=deadline)
+        metrics.record_search(result)
+
+        state['current_guess'] = result.guess
+        return result, state
+
+    @staticmethod
+    def choose_guess(state, budget_ms=None, degrade=True, deadline=None):
+        """
+        The SearchResult for the next guess from 'state', without recording
+        it. The precomputed decision tree answers most histories directly,
+        and the opening book the second guess of other strategies; live
+        search (limited to 'budget_ms', if given) only runs when neither
+        covers the history, and goes through guess_cache so identical
+        histories are searched once, and guess_memo so they stay answered
+        across workers and restarts. With SOLVER_SOCKET set, the search runs
+        in the solver daemon (see solver_client) when it is available.
+
+        Local searches take a slot from admission.GATE; when none frees up
+        by 'deadline' (a time.monotonic() value, by default the gate's queue
+        deadline from now), a short degraded scan is played instead, and an
+        identical search already running is only waited on until then.
+        With 'degrade' False, admission.Saturated is raised instead, and
+        without a 'deadline' the search waits as long as it takes.
+        """
+        if deadline is None and degrade:
+            deadline = admission.turn_deadline()
         guessed_list = state.get('guessed', [])
-        candidates = get_candidates_from_history(guessed_list)
-        guessed_set = {g['guess'] for g in guessed_list}
+        strategy = state.get('strategy', DEFAULT_STRATEGY)
+        with metrics.timed(metrics.PHASE_SECONDS, 'tree_lookup'):
+            guess = decision_tree.lookup(guessed_list, strategy)
+            source = 'tree'
+            if guess is None:
+                guess = opening_book.lookup(guessed_list, strategy)
+                source = 'book'
+        if guess is not None:
+            return SearchResult(guess, source, 0, 0, True)
 
-        guess = get_next_guess(candidates, guessed_set)
-        state['current_guess'] = guess
-        return guess, state
+        def search():
+            bits = AIBrainHard.candidate_bits(state)
+            guessed_set = {as_index(g['guess']) for g in guessed_list}
+            version = f'{strategy}@{SOLVER_VERSION}'
+            # The opener and endgame are answered without scoring; only memoize real searches.
+            memoizable = guessed_list and candidate_sets.count(bits) > 2
+            if memoizable:
+                with metrics.timed(metrics.PHASE_SECONDS, 'memo'):
+                    memoized = guess_memo.MEMO.get(bits, guessed_set, version)
+                if memoized is not None:
+                    return SearchResult(memoized[0], 'memo', 0, memoized[1], True)
+            if memoizable and solver_client.CLIENT is not None:
+                remaining = admission.remaining(deadline)
+                deadline_ms = None if remaining is None else int(remaining * 1000)
+                with metrics.timed(metrics.PHASE_SECONDS, 'daemon'):
+                    remote = solver_client.CLIENT.search(guessed_list, strategy, budget_ms, deadline_ms)
+                if remote is not None:
+                    # The daemon memoizes its own searches.
+                    return SearchResult(*remote)
+            with metrics.timed(metrics.PHASE_SECONDS, 'candidates'):
+                candidates = candidate_sets.to_indices(bits)
+            metrics.CANDIDATE_POOL.observe(len(candidates))
+            gate = admission.GATE if memoizable else None
+            if gate is not None and gate.acquire(admission.remaining(deadline)) not in ('admitted', 'queued'):
+                if not degrade:
+                    raise admission.Saturated('No solver slot freed up before the deadline.')
+                # Saturated: scan candidates-first briefly rather than queue any longer.
+                short_budget = min(budget_ms or admission.DEGRADED_BUDGET_MS, admission.DEGRADED_BUDGET_MS)
+                with metrics.timed(metrics.PHASE_SECONDS, 'search'):
+                    result = search_next_guess(candidates, guessed_set, strategy, short_budget)
+                if not result.complete:
+                    gate.record_degraded()
+                    return result._replace(source='degraded')
+            else:
+                try:
+                    with metrics.timed(metrics.PHASE_SECONDS, 'search'):
+                        result = search_next_guess(candidates, guessed_set, strategy, budget_ms)
+                finally:
+                    if gate is not None:
+                        gate.release()
+            if memoizable and result.complete:
+                guess_memo.MEMO.put(bits, guessed_set, version, result.guess, result.pool_size)
+            return result
+
+        key = guess_cache.history_key(strategy, guessed_list)
+        if budget_ms:
+            # Never wait on someone else's (possibly longer) search under a budget.
+            result = guess_cache.CACHE.get(key)
+            if result is None:
+                result = search()
+                if result.complete:
+                    guess_cache.CACHE.put(key, result)
+                return result
+        else:
+            result, outcome = guess_cache.CACHE.get_or_compute(
+                key, search, lambda r: r.complete, admission.remaining(deadline),
+            )
+            if outcome == 'timeout':
+                # The identical search is still queued or running: degrade rather than wait on.
+                return search()
+            if outcome == 'miss':
+                return result
+        if not result.complete:
+            return result   # never pass a degraded or cut-short guess off as a cache hit
+        return result._replace(source='cache', evaluated=0, pruned=0, skipped=0)
 
     @staticmethod
     def apply_feedback(state, bulls, cows):
@@ -134,9 +566,13 @@ class AIBrainHard:
         guess = state.get('current_guess')
         if guess is None:
             return state
+        guess = as_index(guess)
+
+        bits = filter_candidates(AIBrainHard.candidate_bits(state), guess, bulls, cows)
+        state['candidates'] = candidate_sets.encode(bits)
 
         guessed_list = state.get('guessed', [])
         guessed_list.append({'guess': guess, 'bulls': bulls, 'cows': cows})
         state['guessed'] = guessed_list
         state['current_guess'] = None
-        return state
\ No newline at end of file
+        return state
@@ -1,32 +1,83 @@
 """
 API Routes for Bulls or Cows Game - Vercel Entry Point
+
+Cold starts are timed per stage (see metrics.startup_stage) and logged as one
+'[startup]' line; NumPy and the process pool are only imported if a request
+needs a live search.
 """
 import os
 import random
-from flask import Flask, render_template, request, session, jsonify, redirect, url_for
+import secrets
+
+import metrics
+
+with metrics.startup_stage('flask'):
+    from flask import Flask, Response, render_template, request, session, jsonify, redirect, url_for
+
+with metrics.startup_stage('solver'):
+    from game_logic import validate_number, score_indices, is_winner
+    from ai_solver import AIBrainHard
+    from code_space import ALL_INDICES, as_index, code_of, index_of
+    from strategies import DEFAULT_STRATEGY, STRATEGIES
+    import admission
+    import opening_book
+    import solver_api
+    import state_codec
+    from session_store import configure_sessions
+    from speculation import Speculator
+
+# The decision tree and opening book ship in data/ (vercel.json includeFiles).
+with metrics.startup_stage('data'):
+    import decision_tree
+
+    decision_tree.get_tree()
+    opening_book.preload()
+
+with metrics.startup_stage('app'):
+    # Set up Flask with correct paths for Vercel
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    app = Flask(
+        __name__,
+        template_folder=os.path.join(base_dir, "templates"),
+        static_folder=os.path.join(base_dir, "static")
+    )
+
+    app.secret_key = os.environ.get('SECRET_KEY', 'bulls-cows-hard-mode-secret-2024')
+    # Per-request time budget for the AI's guess search in ms (0 = unlimited).
+    app.config['AI_TURN_BUDGET_MS'] = int(os.environ.get('AI_TURN_BUDGET_MS', '0'))
+    # Lambda instances share no memory or disk, so the signed cookie stays the
+    # default here; set SESSION_BACKEND to use a server-side store.
+    configure_sessions(app, default='cookie')
+    metrics.instrument_app(app)
+    # A lambda is frozen once its response is sent, so background guess
+    # searches would not progress; opt in with SPECULATION_WORKERS.
+    speculator = Speculator.from_env(default_workers=0)
+
+print(f"[startup] {metrics.startup_report()}")
+
 
-from game_logic import validate_number, calculate_bulls_and_cows, is_winner
-from ai_solver import AIBrainHard, generate_all_combinations, filter_candidates
+def pick_ai_secret():
+    """Randomly choose a valid 4-digit unique-digit number (as a code index) for the AI's secret."""
+    return random.choice(ALL_INDICES)
 
-# Set up Flask with correct paths for Vercel
-base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-app = Flask(
-    __name__,
-    template_folder=os.path.join(base_dir, "templates"),
-    static_folder=os.path.join(base_dir, "static")
-)
 
-app.secret_key = os.environ.get('SECRET_KEY', 'bulls-cows-hard-mode-secret-2024')
+def display_code(code):
+    """Render a stored code (index, legacy string or None) for a JSON payload."""
+    if code is None or code == '????':
+        return '????'
+    return code_of(as_index(code))
 
 
-def pick_ai_secret():
-    """Randomly choose a valid 4-digit unique-digit number for the AI's secret."""
-    all_combos = generate_all_combinations()
-    return random.choice(all_combos)
+def render_history(entries):
+    """Convert a stored guess history to its JSON payload form."""
+    return [
+        {'guess': display_code(e['guess']), 'bulls': e['bulls'], 'cows': e['cows']}
+        for e in entries
+    ]
 
 
-def error_response(message, status=400):
-    return jsonify({'success': False, 'error': message}), status
+def error_response(message, status=400, **fields):
+    return jsonify({'success': False, 'error': message, **fields}), status
 
 
 @app.route('/')
@@ -47,10 +98,20 @@ def start():
     Initialize a new game.
     The human THINKS of a secret — never stored server-side.
     AI uses only the feedback the human gives to narrow candidates.
+    Accepts an optional AI 'strategy' (see strategies.STRATEGIES).
     """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return error_response('Request body must be a JSON object.')
+    strategy = data.get('strategy') or DEFAULT_STRATEGY
+    if not isinstance(strategy, str) or strategy not in STRATEGIES:
+        return error_response(f'Unknown strategy. Choose one of: {", ".join(STRATEGIES)}.')
+
+    speculator.discard(session.get('game_id'))
     session.clear()
+    session['game_id'] = secrets.token_hex(8)
     session['ai_secret'] = pick_ai_secret()
-    session['ai_state'] = AIBrainHard.initial_state()
+    session['ai_state'] = AIBrainHard.initial_state(strategy)
     session['human_guesses'] = []
     session['ai_guesses'] = []
     session['game_over'] = False
@@ -59,6 +120,107 @@ def start():
     return jsonify({'success': True, 'redirect': '/game'})
 
 
+def parse_feedback(data):
+    """Read bulls/cows from a JSON object. Returns (bulls, cows, error_message)."""
+    try:
+        bulls = int(data.get('bulls', -1))
+        cows  = int(data.get('cows',  -1))
+    except (TypeError, ValueError):
+        return None, None, 'Bulls and cows must be integers.'
+
+    if not (0 <= bulls <= 4 and 0 <= cows <= 4 and bulls + cows <= 4):
+        return None, None, 'Invalid bulls/cows values (must be 0–4, sum ≤ 4).'
+    return bulls, cows, None
+
+
+def apply_human_guess(guess):
+    """Score a validated human guess against the AI's secret. Returns the JSON payload."""
+    ai_secret = as_index(session['ai_secret'])
+    bulls, cows = score_indices(ai_secret, index_of(guess))
+    won = is_winner(bulls)
+
+    guesses = session.get('human_guesses', [])
+    guesses.append({'guess': index_of(guess), 'bulls': bulls, 'cows': cows})
+    session['human_guesses'] = guesses
+
+    if won:
+        session['game_over'] = True
+        session['winner'] = 'human'
+        app.logger.info('Game over, human wins: %s', state_codec.to_log_string(session))
+        return {
+            'success': True, 'bulls': bulls, 'cows': cows,
+            'won': True, 'winner': 'human', 'ai_secret': code_of(ai_secret),
+        }
+
+    session['turn'] = 'ai'
+    return {'success': True, 'bulls': bulls, 'cows': cows, 'won': False}
+
+
+def make_ai_guess(budget_ms):
+    """
+    Have the AI pick its next guess, using the speculated search for this
+    game if one is ready or running. Returns the JSON payload fields.
+    """
+    ai_state = session.get('ai_state')
+    # One admission deadline covers waiting on the speculation and on a solver slot.
+    deadline = admission.turn_deadline()
+    speculated = speculator.take(session.get('game_id'), ai_state, budget_ms, admission.remaining(deadline))
+    search, ai_state = AIBrainHard.make_guess_detailed(ai_state, budget_ms or None, speculated, deadline)
+    session['ai_state'] = ai_state
+
+    return {
+        'ai_guess': code_of(search.guess),
+        'search': {
+            'source': search.source,
+            'evaluated': search.evaluated,
+            'pool_size': search.pool_size,
+            'complete': search.complete,
+            'pruned': search.pruned,
+            'skipped': search.skipped,
+        },
+    }
+
+
+def apply_ai_feedback(bulls, cows):
+    """
+    Record the human's feedback for the AI's pending guess; the AI narrows
+    its candidate pool. Returns (payload, error_message).
+    """
+    ai_state = session['ai_state']
+    real_guess = ai_state.get('current_guess')
+    won = is_winner(bulls)
+
+    # Apply feedback to a copy — AI eliminates impossible candidates. The
+    # session only changes once the feedback is known to be consistent, so
+    # contradictory feedback can be corrected and sent again.
+    ai_state = AIBrainHard.apply_feedback(dict(ai_state, guessed=list(ai_state.get('guessed', []))), bulls, cows)
+    if not won and AIBrainHard.candidate_count(ai_state) == 0:
+        return None, (
+            'No valid numbers remain! Your feedback may be inconsistent. '
+            'Please verify your answers or start a new game.'
+        )
+    session['ai_state'] = ai_state
+
+    ai_guesses = session.get('ai_guesses', [])
+    ai_guesses.append({
+        'guess': as_index(real_guess) if real_guess is not None else None,
+        'bulls': bulls, 'cows': cows,
+    })
+    session['ai_guesses'] = ai_guesses
+
+    if won:
+        session['game_over'] = True
+        session['winner'] = 'ai'
+        app.logger.info('Game over, ai wins: %s', state_codec.to_log_string(session))
+        return {
+            'success': True, 'won': True, 'winner': 'ai',
+            'ai_guess': display_code(real_guess),
+        }, None
+
+    session['turn'] = 'human'
+    return {'success': True, 'won': False}, None
+
+
 @app.route('/human-turn', methods=['POST'])
 def human_turn():
     """Human guesses the AI's secret."""
@@ -78,24 +240,7 @@ def human_turn():
     if not valid:
         return error_response(msg)
 
-    ai_secret = session['ai_secret']
-    bulls, cows = calculate_bulls_and_cows(ai_secret, guess)
-    won = is_winner(bulls)
-
-    guesses = session.get('human_guesses', [])
-    guesses.append({'guess': guess, 'bulls': bulls, 'cows': cows})
-    session['human_guesses'] = guesses
-
-    if won:
-        session['game_over'] = True
-        session['winner'] = 'human'
-        return jsonify({
-            'success': True, 'bulls': bulls, 'cows': cows,
-            'won': True, 'winner': 'human', 'ai_secret': ai_secret,
-        })
-
-    session['turn'] = 'ai'
-    return jsonify({'success': True, 'bulls': bulls, 'cows': cows, 'won': False})
+    return jsonify(apply_human_guess(guess))
 
 
 @app.route('/ai-turn', methods=['GET'])
@@ -108,11 +253,8 @@ def ai_turn():
     if session.get('turn') != 'ai':
         return error_response("It is not the AI's turn.")
 
-    ai_state = session.get('ai_state')
-    guess, ai_state = AIBrainHard.make_guess(ai_state)
-    session['ai_state'] = ai_state
-
-    return jsonify({'success': True, 'ai_guess': guess})
+    budget_ms = request.args.get('budget_ms', app.config['AI_TURN_BUDGET_MS'], type=int)
+    return jsonify({'success': True, **make_ai_guess(budget_ms)})
 
 
 @app.route('/ai-feedback', methods=['POST'])
@@ -132,48 +274,73 @@ def ai_feedback():
     if not data:
         return error_response('No data provided.')
 
-    try:
-        bulls = int(data.get('bulls', -1))
-        cows  = int(data.get('cows',  -1))
-    except (TypeError, ValueError):
-        return error_response('Bulls and cows must be integers.')
-
-    if not (0 <= bulls <= 4 and 0 <= cows <= 4 and bulls + cows <= 4):
-        return error_response('Invalid bulls/cows values (must be 0–4, sum ≤ 4).')
-
-    ai_state = session['ai_state']
-    real_guess = ai_state.get('current_guess')
-    won = is_winner(bulls)
+    bulls, cows, error = parse_feedback(data)
+    if error:
+        return error_response(error)
 
-    # Apply feedback — AI eliminates impossible candidates
-    ai_state = AIBrainHard.apply_feedback(ai_state, bulls, cows)
-    session['ai_state'] = ai_state
+    payload, error = apply_ai_feedback(bulls, cows)
+    if error:
+        return error_response(error)
+    if not payload['won']:
+        # Start on the AI's next guess while the human takes their turn.
+        speculator.submit(session.get('game_id'), session['ai_state'], app.config['AI_TURN_BUDGET_MS'])
+    return jsonify(payload)
 
-    ai_guesses = session.get('ai_guesses', [])
-    ai_guesses.append({'guess': real_guess or '????', 'bulls': bulls, 'cows': cows})
-    session['ai_guesses'] = ai_guesses
 
-    if won:
-        session['game_over'] = True
-        session['winner'] = 'ai'
-        return jsonify({
-            'success': True, 'won': True, 'winner': 'ai',
-            'ai_guess': real_guess,
-        })
+@app.route('/turn', methods=['POST'])
+def play_turn():
+    """
+    A whole round in one request. Takes the human's 'guess' and, once the AI
+    has guessed, 'feedback' ({bulls, cows}) for that pending AI guess.
+    The feedback is applied first, then the guess is scored, then the AI
+    picks its next guess; the response carries the human's bulls/cows plus
+    'ai_guess' and 'search' as /ai-turn returns them. If either side wins
+    the game ends there and the response matches /ai-feedback or
+    /human-turn. Accepts 'budget_ms' like /ai-turn. Rejected feedback leaves
+    the session unchanged and the error response has 'feedback_error' set.
+    """
+    if 'ai_secret' not in session:
+        return error_response('No active game. Please start a new game.', 403)
+    if session.get('game_over'):
+        return error_response('Game is already over.')
 
-    # Check remaining candidates — detect contradictory feedback
-    candidates = generate_all_combinations()
-    for entry in ai_state.get('guessed', []):
-        candidates = filter_candidates(candidates, entry['guess'], entry['bulls'], entry['cows'])
+    data = request.get_json(silent=True)
+    if not data:
+        return error_response('No data provided.')
+    if not isinstance(data, dict):
+        return error_response('Request body must be a JSON object.')
 
-    if len(candidates) == 0:
-        return error_response(
-            'No valid numbers remain! Your feedback may be inconsistent. '
-            'Please verify your answers or start a new game.'
-        )
+    guess = str(data.get('guess', '')).strip()
+    valid, msg = validate_number(guess)
+    if not valid:
+        return error_response(msg)
 
-    session['turn'] = 'human'
-    return jsonify({'success': True, 'won': False})
+    awaiting_feedback = session.get('turn') == 'ai' and session['ai_state'].get('current_guess') is not None
+    feedback = data.get('feedback')
+    if session.get('turn') != 'human' and not awaiting_feedback:
+        return error_response('It is not your turn.')
+    if awaiting_feedback and not isinstance(feedback, dict):
+        return error_response("Feedback for the AI's last guess is required.")
+    if not awaiting_feedback and feedback is not None:
+        return error_response('No AI guess is awaiting feedback.')
+
+    if awaiting_feedback:
+        bulls, cows, error = parse_feedback(feedback)
+        if not error:
+            payload, error = apply_ai_feedback(bulls, cows)
+        if error:
+            # Nothing was saved: the client asks for the feedback again.
+            return error_response(error, feedback_error=True)
+        if payload['won']:
+            return jsonify(payload)
+
+    payload = apply_human_guess(guess)
+    if payload['won']:
+        return jsonify(payload)
+
+    budget_ms = request.args.get('budget_ms', app.config['AI_TURN_BUDGET_MS'], type=int)
+    payload.update(make_ai_guess(budget_ms))
+    return jsonify(payload)
 
 
 @app.route('/result', methods=['GET'])
@@ -182,14 +349,58 @@ def result():
         'success': True,
         'game_over': session.get('game_over', False),
         'winner': session.get('winner'),
-        'human_guesses': session.get('human_guesses', []),
-        'ai_guesses': session.get('ai_guesses', []),
+        'human_guesses': render_history(session.get('human_guesses', [])),
+        'ai_guesses': render_history(session.get('ai_guesses', [])),
         'turn': session.get('turn'),
     })
 
 
+@app.route('/solve', methods=['GET'])
+def solve():
+    """
+    Stateless next guess for an encoded history (see solver_api): no session
+    is read or written, and answers are cacheable by ETag for a year.
+    """
+    try:
+        strategy, history = solver_api.parse_query(request.args)
+    except ValueError as exc:
+        return error_response(str(exc))
+
+    etag = solver_api.etag(strategy, history)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        payload, status = solver_api.solve(strategy, history)
+        response = jsonify(payload)
+        response.status_code = status
+        if status == 503:
+            response.headers['Cache-Control'] = 'no-store'
+            response.headers['Retry-After'] = str(solver_api.RETRY_AFTER_SECONDS)
+            return response
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = solver_api.CACHE_CONTROL
+    return response
+
+
+@app.route('/admin/stats', methods=['GET'])
+def admin_stats():
+    """Admission control state and how this process's AI guesses were chosen, as JSON."""
+    gate = admission.GATE
+    return jsonify({
+        'admission': gate.stats() if gate is not None else None,
+        'guess_sources': {labels[0]: n for labels, n in metrics.GUESS_SOURCE.values().items()},
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus text exposition of this process's solver and request metrics."""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.route('/reset', methods=['POST'])
 def reset():
+    speculator.discard(session.get('game_id'))
     session.clear()
     return jsonify({'success': True, 'redirect': '/'})
 
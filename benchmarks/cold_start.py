@@ -0,0 +1,111 @@
+"""
+cold_start.py - Cold-start profile of the Vercel entry point (api/index.py).
+
+Each run starts a fresh interpreter with empty table directories, imports
+api/index.py and plays the first requests of a game, like a new lambda
+instance would. Reports the median over runs of every startup stage
+(metrics.STARTUP), the first request of each endpoint and the whole process,
+in milliseconds. Track it per release with --json.
+
+Usage:
+    python benchmarks/cold_start.py [--runs 5] [--strategy NAME] [--json report.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(strategy):
+    """Runs inside the fresh interpreter: import the app, play the first turns."""
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, os.path.join(ROOT, 'api'))
+    with contextlib.redirect_stdout(io.StringIO()):
+        import index
+
+    import metrics
+
+    client = index.app.test_client()
+    requests = {}
+
+    def timed(name, fn):
+        start = time.perf_counter()
+        response = fn()
+        requests[name] = (time.perf_counter() - start) * 1000
+        return response
+
+    timed('start', lambda: client.post('/start', json={'strategy': strategy}))
+    timed('human_turn', lambda: client.post('/human-turn', json={'guess': '4567'}))
+    timed('ai_turn_1', lambda: client.get('/ai-turn'))
+    timed('ai_feedback_1', lambda: client.post('/ai-feedback', json={'bulls': 0, 'cows': 1}))
+    client.post('/human-turn', json={'guess': '5678'})
+    timed('ai_turn_2', lambda: client.get('/ai-turn'))
+    timed('ai_feedback_2', lambda: client.post('/ai-feedback', json={'bulls': 1, 'cows': 1}))
+
+    startup = {stage: seconds * 1000 for stage, seconds in metrics.STARTUP.items()}
+    print(json.dumps({'startup': startup, 'requests': requests}))
+
+
+def run_once(strategy):
+    """One cold process. Returns its child() report plus the process wall time."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            FEEDBACK_TABLE_PATH=os.path.join(tmp, 'feedback.bin'),
+            CANDIDATE_TABLE_PATH=os.path.join(tmp, 'consistency.bin'),
+            GUESS_MEMO_PATH=os.path.join(tmp, 'memo.sqlite3'),
+        )
+        start = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', '--strategy', strategy],
+            env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        wall = (time.perf_counter() - start) * 1000
+    report = json.loads(out.strip().splitlines()[-1])
+    report['process'] = {'wall': wall}
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Profile cold starts of api/index.py.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--strategy', default='minimax')
+    parser.add_argument('--json', metavar='PATH', help='also write the medians as JSON')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.strategy)
+        return 0
+
+    runs = [run_once(args.strategy) for _ in range(args.runs)]
+    medians = {
+        section: {
+            name: round(statistics.median(run[section][name] for run in runs), 2)
+            for name in runs[0][section]
+        }
+        for section in ('startup', 'requests', 'process')
+    }
+
+    print(f'cold start, median of {args.runs} runs, strategy {args.strategy} (ms)')
+    for section, values in medians.items():
+        print(f'[{section}]')
+        for name, value in values.items():
+            print(f'  {name:<16} {value:>10.2f}')
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump({'strategy': args.strategy, 'runs': args.runs, **medians}, fh, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+compare_strategies.py - Average guesses vs. CPU time per turn for each AI strategy.
+
+Plays the solver against a fixed-seed sample of secrets (or all 5040 with
+--all) once per registered strategy, using live search (no decision tree),
+and prints one row per strategy.
+
+Usage:
+    python benchmarks/compare_strategies.py [--sample N] [--all] [--seed S]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import candidate_sets  # noqa: E402
+from ai_solver import get_next_guess  # noqa: E402
+from code_space import NUM_CODES  # noqa: E402
+from game_logic import score_indices  # noqa: E402
+from strategies import STRATEGIES  # noqa: E402
+
+
+def play(secret, strategy):
+    """Solve one secret. Returns (guesses, cpu_seconds_spent_choosing_guesses)."""
+    bits = candidate_sets.FULL
+    guessed = set()
+    cpu = 0.0
+    while True:
+        start = time.process_time()
+        guess = get_next_guess(candidate_sets.to_indices(bits), guessed, strategy)
+        cpu += time.process_time() - start
+        guessed.add(guess)
+        bulls, cows = score_indices(secret, guess)
+        if bulls == 4:
+            return len(guessed), cpu
+        bits &= candidate_sets.consistent_with(guess, bulls, cows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sample', type=int, default=200, help='number of secrets to play')
+    parser.add_argument('--all', action='store_true', help='play every valid secret')
+    parser.add_argument('--seed', type=int, default=2024)
+    args = parser.parse_args(argv)
+
+    secrets = list(range(NUM_CODES))
+    if not args.all:
+        secrets = random.Random(args.seed).sample(secrets, args.sample)
+
+    print(f'{"strategy":<14} {"avg":>6} {"max":>4} {"ms/turn":>9}')
+    for name in STRATEGIES:
+        results = [play(secret, name) for secret in secrets]
+        turns = sum(g for g, _ in results)
+        cpu = sum(c for _, c in results)
+        print(f'{name:<14} {turns / len(results):>6.3f} {max(g for g, _ in results):>4} '
+              f'{1000 * cpu / turns:>9.2f}')
+
+
+if __name__ == '__main__':
+    main()
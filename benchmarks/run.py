@@ -0,0 +1,260 @@
+"""
+run.py - Benchmark suite for the Bulls or Cows solver and HTTP turn cycle.
+
+Four levels, all offline and fixed-seed:
+    scoring    calculate_bulls_and_cows and table-backed score_indices
+    filtering  filter_candidates and get_candidates_from_history by history length
+    search     get_next_guess at AI turns 2, 3 and 4 (live search, no decision tree)
+    http       /start -> /human-turn -> /ai-turn -> /ai-feedback via the Flask test client,
+               and the same rounds through the combined /turn endpoint
+
+Each benchmark reports the median time per call in microseconds. Results are
+compared to benchmarks/baseline.json (keyed by solver backend); anything
+slower than baseline * (1 + tolerance) is a regression and the run exits 1.
+Baselines are machine-specific: re-record with --update-baseline after
+intentional changes or on new hardware.
+
+Usage:
+    python benchmarks/run.py [--level LEVEL ...] [--tolerance 0.5] [--update-baseline]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import ai_solver  # noqa: E402
+import candidate_sets  # noqa: E402
+from code_space import CODES, NUM_CODES  # noqa: E402
+from game_logic import calculate_bulls_and_cows, score_indices  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+SEED = 1234
+REPEATS = 7
+# Each timed sample runs for at least this long, so tiny calls are not noise.
+MIN_SAMPLE_SECONDS = 0.02
+LEVELS = ('scoring', 'filtering', 'search', 'http')
+
+
+def measure(fn, repeats=REPEATS):
+    """
+    Median microseconds per call of fn() over 'repeats' samples, each running
+    fn() enough times to last at least MIN_SAMPLE_SECONDS.
+    """
+    fn()  # warm caches (feedback table, lazy tables)
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= MIN_SAMPLE_SECONDS:
+            break
+        number *= 2
+
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return round(statistics.median(samples) * 1e6, 3)
+
+
+def fixed_histories(count, length):
+    """'count' AI histories of exactly 'length' turns, played against seeded secrets."""
+    rng = random.Random(SEED)
+    histories = []
+    while len(histories) < count:
+        secret = rng.randrange(NUM_CODES)
+        history = []
+        guess = ai_solver.OPENER
+        while len(history) < length:
+            bulls, cows = score_indices(secret, guess)
+            if bulls == 4:
+                break
+            history.append({'guess': guess, 'bulls': bulls, 'cows': cows})
+            guess = ai_solver.get_next_guess(
+                ai_solver.get_candidates_from_history(history), {h['guess'] for h in history},
+            )
+        if len(history) == length:
+            histories.append(history)
+    return histories
+
+
+def bench_scoring():
+    rng = random.Random(SEED)
+    pairs = [(rng.randrange(NUM_CODES), rng.randrange(NUM_CODES)) for _ in range(10000)]
+    string_pairs = [(CODES[s], CODES[g]) for s, g in pairs]
+
+    def reference():
+        for secret, guess in string_pairs:
+            calculate_bulls_and_cows(secret, guess)
+
+    def table():
+        for secret, guess in pairs:
+            score_indices(secret, guess)
+
+    return {
+        'calculate_bulls_and_cows_x10000': measure(reference),
+        'score_indices_x10000': measure(table),
+    }
+
+
+def bench_filtering():
+    results = {}
+    for length in (1, 2, 3, 4):
+        history = fixed_histories(1, length)[0]
+        results[f'get_candidates_from_history_len{length}'] = measure(
+            lambda: ai_solver.get_candidates_from_history(history),
+        )
+    everything = list(range(NUM_CODES))
+    first = fixed_histories(1, 1)[0][0]
+    results['filter_candidates_full_list'] = measure(
+        lambda: ai_solver.filter_candidates(everything, first['guess'], first['bulls'], first['cows']),
+    )
+    results['filter_candidates_bitset'] = measure(
+        lambda: ai_solver.filter_candidates(candidate_sets.FULL, first['guess'], first['bulls'], first['cows']),
+    )
+    return results
+
+
+def bench_search():
+    results = {}
+    for turn in (2, 3, 4):
+        cases = [
+            (ai_solver.get_candidates_from_history(h), {e['guess'] for e in h})
+            for h in fixed_histories(5, turn - 1)
+        ]
+
+        def run():
+            for candidates, guessed in cases:
+                ai_solver.get_next_guess(candidates, guessed)
+
+        results[f'get_next_guess_turn{turn}_x5'] = measure(run, repeats=3)
+    return results
+
+
+def bench_http():
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app import app
+
+    rng = random.Random(SEED)
+    secrets = [CODES[rng.randrange(NUM_CODES)] for _ in range(5)]
+
+    def play_rounds():
+        client = app.test_client()
+        for secret in secrets:
+            client.post('/start', json={})
+            for _ in range(3):
+                client.post('/human-turn', json={'guess': CODES[rng.randrange(NUM_CODES)]})
+                guess = client.get('/ai-turn').get_json()['ai_guess']
+                bulls, cows = calculate_bulls_and_cows(secret, guess)
+                if bulls == 4:
+                    break
+                client.post('/ai-feedback', json={'bulls': bulls, 'cows': cows})
+
+    def play_combined_rounds():
+        client = app.test_client()
+        for secret in secrets:
+            client.post('/start', json={})
+            body = {}
+            for _ in range(3):
+                body['guess'] = CODES[rng.randrange(NUM_CODES)]
+                guess = client.post('/turn', json=body).get_json()['ai_guess']
+                bulls, cows = calculate_bulls_and_cows(secret, guess)
+                if bulls == 4:
+                    break
+                body['feedback'] = {'bulls': bulls, 'cows': cows}
+
+    def one_round():
+        rng.seed(SEED)
+        with contextlib.redirect_stdout(io.StringIO()):
+            play_rounds()
+
+    def one_combined_round():
+        rng.seed(SEED)
+        with contextlib.redirect_stdout(io.StringIO()):
+            play_combined_rounds()
+
+    return {
+        'http_5_games_3_rounds': measure(one_round, repeats=3),
+        'http_turn_5_games_3_rounds': measure(one_combined_round, repeats=3),
+    }
+
+
+BENCHMARKS = {
+    'scoring': bench_scoring,
+    'filtering': bench_filtering,
+    'search': bench_search,
+    'http': bench_http,
+}
+
+
+def compare(results, baseline, tolerance):
+    """Print each result against the baseline; return the names that regressed."""
+    regressions = []
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f'  {name:<42} {value:>12.1f} us   (no baseline)')
+            continue
+        ratio = value / base if base else float('inf')
+        flag = ''
+        if ratio > 1 + tolerance:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f'  {name:<42} {value:>12.1f} us   x{ratio:.2f} of baseline{flag}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the solver benchmark suite.')
+    parser.add_argument('--level', action='append', choices=LEVELS, help='run only these levels')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='allowed slowdown vs baseline before failing (0.5 = 50%%)')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='record these results as the new baseline')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    args = parser.parse_args(argv)
+
+    backend = 'numpy' if ai_solver.USE_NUMPY else 'python'
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as fh:
+            stored = json.load(fh)
+    baseline = stored.get(backend, {})
+
+    results = {}
+    regressions = []
+    for level in args.level or LEVELS:
+        print(f'[{level}] backend={backend}')
+        level_results = BENCHMARKS[level]()
+        results.update(level_results)
+        regressions += compare(level_results, baseline, args.tolerance)
+
+    if args.update_baseline:
+        stored[backend] = {**baseline, **results}
+        with open(args.baseline, 'w') as fh:
+            json.dump(stored, fh, indent=2, sort_keys=True)
+            fh.write('\n')
+        print(f'Baseline for {backend} written to {args.baseline}')
+        return 0
+
+    if regressions:
+        print(f'FAILED: {len(regressions)} benchmark(s) slower than baseline by more than '
+              f'{args.tolerance:.0%}: {", ".join(regressions)}')
+        return 1
+    print('OK: no regressions')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
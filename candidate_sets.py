@@ -0,0 +1,181 @@
+"""
+candidate_sets.py - Compact bitset representation of candidate code sets.
+
+A candidate set is a Python int with bit i set when code index i is still
+possible. For session storage it is serialized as the base64 of its
+630-byte little-endian form, so the solver state stays a plain string.
+
+The consistency table maps every (guess, feedback) pair to the bitset of
+secrets that would produce that feedback, so filtering a candidate set is a
+single '&' and counting it is int.bit_count() — no NumPy required. Entries are
+built lazily from the feedback table; the full table (14 reachable feedbacks
+per guess) can also be written to disk ahead of time and is then memory-mapped:
+    python candidate_sets.py [path]
+Only the first TABLE_CACHE_ENTRIES entries looked up (the openers and other
+hot guesses) are cached per process, whether read from the mapped table or
+built lazily, so forked workers keep sharing the table's pages instead of
+each copying it into private memory (see preload), and a process without
+the table stays within the same bound.
+"""
+
+import base64
+import mmap
+import os
+import sys
+import tempfile
+
+from code_space import NUM_CODES, as_index
+from feedback_table import encode_feedback, feedback_row
+
+NUM_BYTES = (NUM_CODES + 7) // 8
+FULL = (1 << NUM_CODES) - 1
+EMPTY = 0
+
+
+def from_indices(indices):
+    """Bitset with the bits of the given code indices set."""
+    buf = bytearray(NUM_BYTES)
+    for i in indices:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, 'little')
+
+
+def to_indices(bits):
+    """Sorted list of the code indices set in 'bits'."""
+    return [i for i, bit in enumerate(bin(bits)[:1:-1]) if bit == '1']
+
+
+def count(bits):
+    """Number of codes in the set."""
+    return bits.bit_count()
+
+
+def encode(bits):
+    """Serialize a bitset to an ASCII string for session storage."""
+    return base64.b64encode(bits.to_bytes(NUM_BYTES, 'little')).decode('ascii')
+
+
+def decode(text):
+    """Inverse of encode()."""
+    return int.from_bytes(base64.b64decode(text), 'little')
+
+
+# Feedback bytes that can actually occur (3 bulls + 1 cow is impossible).
+REACHABLE_FEEDBACKS = tuple(
+    encode_feedback(b, c) for b in range(5) for c in range(5 - b) if (b, c) != (3, 1)
+)
+_SLOT = {fb: slot for slot, fb in enumerate(REACHABLE_FEEDBACKS)}
+_RECORD = len(REACHABLE_FEEDBACKS) * NUM_BYTES
+
+DEFAULT_PATH = os.environ.get(
+    'CANDIDATE_TABLE_PATH',
+    os.path.join(tempfile.gettempdir(), 'bulls_cows_consistency.bin'),
+)
+
+# Byte translation tables turning a feedback row into ASCII '0'/'1' flags.
+_FLAGS = {
+    fb: bytes(ord('1') if i == fb else ord('0') for i in range(256))
+    for fb in REACHABLE_FEEDBACKS
+}
+
+# Entries cached per process, ~700 bytes each.
+TABLE_CACHE_ENTRIES = 4096
+
+_consistent = {}
+_disk_table = None
+_disk_checked = False
+
+
+def _build_entry(guess_idx, fb):
+    """Bitset of secrets giving feedback 'fb' to 'guess_idx', from the feedback table."""
+    if fb not in _FLAGS:
+        return EMPTY
+    return int(feedback_row(guess_idx).translate(_FLAGS[fb])[::-1], 2)
+
+
+def _load_disk_table():
+    """Memory-map the on-disk consistency table once, if it has been built."""
+    global _disk_table, _disk_checked
+    if not _disk_checked:
+        _disk_checked = True
+        if os.path.exists(DEFAULT_PATH) and os.path.getsize(DEFAULT_PATH) == NUM_CODES * _RECORD:
+            with open(DEFAULT_PATH, 'rb') as fh:
+                _disk_table = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    return _disk_table
+
+
+def get_table(build=False):
+    """
+    The memory-mapped consistency table, or None when it has not been
+    built; with 'build', write it to DEFAULT_PATH first if it is missing.
+    """
+    global _disk_checked
+    if build and _load_disk_table() is None:
+        save_table()
+        _disk_checked = False
+    return _load_disk_table()
+
+
+def use_buffer(buf):
+    """
+    Read the consistency table from the start of 'buf' (e.g. a shared
+    memory block, which may be rounded up to whole pages) instead of
+    DEFAULT_PATH. use_buffer(None) releases the buffer.
+    """
+    global _disk_table, _disk_checked
+    if isinstance(_disk_table, memoryview):
+        _disk_table.release()
+    if buf is None:
+        _disk_table, _disk_checked = None, False
+        return
+    if len(buf) < NUM_CODES * _RECORD:
+        raise ValueError('Buffer is too small for the consistency table.')
+    _disk_table, _disk_checked = memoryview(buf)[:NUM_CODES * _RECORD], True
+
+
+def consistent_with(guess_idx, bulls, cows):
+    """Bitset of every secret that answers 'guess_idx' with (bulls, cows)."""
+    fb = encode_feedback(bulls, cows)
+    key = guess_idx * 32 + fb
+    bits = _consistent.get(key)
+    if bits is None:
+        table = _load_disk_table()
+        if table is not None and fb in _SLOT:
+            start = guess_idx * _RECORD + _SLOT[fb] * NUM_BYTES
+            bits = int.from_bytes(table[start:start + NUM_BYTES], 'little')
+        else:
+            bits = _build_entry(guess_idx, fb)
+        if len(_consistent) < TABLE_CACHE_ENTRIES:
+            _consistent[key] = bits
+    return bits
+
+
+def prime(guess_idx, bulls, cows, bits):
+    """Seed the consistency cache with a precomputed entry (see opening_book)."""
+    _consistent[guess_idx * 32 + encode_feedback(bulls, cows)] = bits
+
+
+def from_history(history):
+    """Bitset of candidates consistent with a list of {guess, bulls, cows} entries."""
+    bits = FULL
+    for entry in history:
+        bits &= consistent_with(as_index(entry['guess']), entry['bulls'], entry['cows'])
+    return bits
+
+
+def save_table(path=DEFAULT_PATH):
+    """Build the full consistency table and write it atomically to 'path'. Returns the path."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as fh:
+        for guess_idx in range(NUM_CODES):
+            for fb in REACHABLE_FEEDBACKS:
+                fh.write(_build_entry(guess_idx, fb).to_bytes(NUM_BYTES, 'little'))
+    os.replace(tmp_path, path)
+    return path
+
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH
+    print(f'Wrote consistency table to {save_table(target)}')
@@ -0,0 +1,49 @@
+"""
+code_space.py - Dense integer indexing of every valid Bulls or Cows code.
+
+Each 4-digit code with unique digits gets an index in 0..5039, following the
+lexicographic order of itertools.permutations('0123456789', 4) (so '0123' is 0
+and '9876' is 5039). The solver works on these indices internally; codes are
+only turned back into strings at the Flask boundary.
+
+Lookups provided per index:
+- CODES[i]        the 4-character string
+- DIGITS[i]       the digits by position, as a tuple of ints
+- DIGIT_MASKS[i]  bitmask of the digits used (bit d set for digit d)
+"""
+
+from itertools import permutations
+
+CODES = tuple(''.join(p) for p in permutations('0123456789', 4))
+NUM_CODES = len(CODES)
+ALL_INDICES = range(NUM_CODES)
+
+_INDEX = {code: i for i, code in enumerate(CODES)}
+
+DIGITS = tuple(tuple(int(ch) for ch in code) for code in CODES)
+DIGIT_MASKS = tuple(sum(1 << d for d in digits) for digits in DIGITS)
+
+
+def index_of(code):
+    """Index of a code string. Raises KeyError for invalid codes."""
+    return _INDEX[code]
+
+
+def code_of(index):
+    """Code string for an index."""
+    return CODES[index]
+
+
+def as_index(code):
+    """
+    Normalize a code given either as an index or as a string to its index.
+    Lets state written before the index layer (plain strings) be read back.
+    """
+    if isinstance(code, str):
+        return _INDEX[code]
+    return code
+
+
+def digit_at(index, position):
+    """Digit at 'position' (0-3) of the code with the given index."""
+    return DIGITS[index][position]
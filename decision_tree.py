@@ -0,0 +1,173 @@
+"""
+decision_tree.py - Offline-expanded strategy tree for the hard-mode AI.
+
+The hard AI is deterministic (opener '0123', then get_next_guess with fixed
+tie-breaks), so its whole strategy can be expanded ahead of time into a tree
+keyed by the feedback sequence. At request time, AIBrainHard.make_guess walks
+the tree in O(depth) and only falls back to live search when the history
+leaves it (e.g. a game started under a different solver version).
+
+Serialized format (all integers little-endian):
+    header  b'BCDT', version byte, name length byte, strategy name (ASCII)
+    nodes   pre-order; per node a uint16 guess index and a uint16 bitmask
+            over candidate_sets.REACHABLE_FEEDBACKS saying which child
+            subtrees follow, in that order. The winning feedback has no child.
+
+Loaded, the tree is two flat arrays rather than nested Python objects, so
+walking it never writes to pages shared with forked workers (see preload).
+
+Only one strategy's tree is shipped (minimax, the default); games using
+another strategy get their second guess from opening_book and search live
+after that. Rebuild after any change to get_next_guess with:
+    python decision_tree.py [path] [strategy]
+"""
+
+import os
+import struct
+import sys
+from array import array
+
+import candidate_sets
+from code_space import as_index
+from feedback_table import WIN_FEEDBACK, encode_feedback
+from strategies import DEFAULT_STRATEGY
+
+MAGIC = b'BCDT'
+FORMAT_VERSION = 1
+
+DEFAULT_PATH = os.environ.get(
+    'DECISION_TREE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'decision_tree.bin'),
+)
+
+# Set DECISION_TREE=0 (or ENABLED = False) to always search live.
+ENABLED = os.environ.get('DECISION_TREE', '1') != '0'
+
+_NODE = struct.Struct('<HH')
+_SLOTS = len(candidate_sets.REACHABLE_FEEDBACKS)
+_SLOT = {fb: slot for slot, fb in enumerate(candidate_sets.REACHABLE_FEEDBACKS)}
+
+_tree = None
+_tree_loaded = False
+
+
+def build_tree(strategy=DEFAULT_STRATEGY):
+    """
+    Expand the solver's strategy from the opener. Returns the root node,
+    where a node is (guess_index, {feedback_byte: child_node}).
+    """
+    from ai_solver import get_next_guess
+
+    def expand(bits, guessed):
+        guess = get_next_guess(candidate_sets.to_indices(bits), guessed, strategy)
+        children = {}
+        for fb in candidate_sets.REACHABLE_FEEDBACKS:
+            if fb == WIN_FEEDBACK:
+                continue
+            child_bits = bits & candidate_sets.consistent_with(guess, *divmod(fb, 5))
+            if child_bits:
+                children[fb] = expand(child_bits, guessed | {guess})
+        return guess, children
+
+    return expand(candidate_sets.FULL, frozenset())
+
+
+def serialize(root, strategy=DEFAULT_STRATEGY):
+    """Encode a tree from build_tree() into the compact binary format."""
+    name = strategy.encode('ascii')
+    out = bytearray(MAGIC + bytes([FORMAT_VERSION, len(name)]) + name)
+
+    def emit(node):
+        guess, children = node
+        mask = 0
+        for slot, fb in enumerate(candidate_sets.REACHABLE_FEEDBACKS):
+            if fb in children:
+                mask |= 1 << slot
+        out.extend(_NODE.pack(guess, mask))
+        for fb in candidate_sets.REACHABLE_FEEDBACKS:
+            if fb in children:
+                emit(children[fb])
+
+    emit(root)
+    return bytes(out)
+
+
+def deserialize(data):
+    """
+    Decode serialized bytes. Returns (strategy_name, guesses, children):
+    node i (the root is 0) plays guesses[i], and children[i * _SLOTS + slot]
+    is the node reached by feedback REACHABLE_FEEDBACKS[slot], or 0 for none.
+    """
+    if data[:4] != MAGIC or data[4] != FORMAT_VERSION:
+        raise ValueError('Not a decision tree file, or unsupported version.')
+    name_len = data[5]
+    strategy = data[6:6 + name_len].decode('ascii')
+    offset = 6 + name_len
+    guesses = array('H')
+    children = array('I')
+
+    def read():
+        nonlocal offset
+        guess, mask = _NODE.unpack_from(data, offset)
+        offset += _NODE.size
+        node = len(guesses)
+        guesses.append(guess)
+        children.extend(bytes(_SLOTS))
+        for slot in range(_SLOTS):
+            if mask & (1 << slot):
+                children[node * _SLOTS + slot] = read()
+        return node
+
+    read()
+    return strategy, guesses, children
+
+
+def save_tree(path=DEFAULT_PATH, strategy=DEFAULT_STRATEGY):
+    """Build the tree for 'strategy' and write it to 'path'. Returns the path."""
+    data = serialize(build_tree(strategy), strategy)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'wb') as fh:
+        fh.write(data)
+    return path
+
+
+def get_tree():
+    """
+    Return (strategy_name, guesses, children) for the shipped tree (see
+    deserialize), or None if no tree file exists.
+    """
+    global _tree, _tree_loaded
+    if not _tree_loaded:
+        # Set the flag only after loading, so a concurrent caller never
+        # sees a missing tree while the file is read.
+        if os.path.exists(DEFAULT_PATH):
+            with open(DEFAULT_PATH, 'rb') as fh:
+                _tree = deserialize(fh.read())
+        _tree_loaded = True
+    return _tree
+
+
+def lookup(history, strategy=DEFAULT_STRATEGY):
+    """
+    Next guess for a list of {guess, bulls, cows} entries, or None when the
+    history is not on the tree (or no tree is available for 'strategy').
+    """
+    tree = get_tree() if ENABLED else None
+    if tree is None or tree[0] != strategy:
+        return None
+    _, guesses, children = tree
+    node = 0
+    for entry in history:
+        slot = _SLOT.get(encode_feedback(entry['bulls'], entry['cows']))
+        if guesses[node] != as_index(entry['guess']) or slot is None:
+            return None
+        node = children[node * _SLOTS + slot]
+        if not node:
+            return None
+    return guesses[node]
+
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH
+    name = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_STRATEGY
+    print(f'Wrote {name} decision tree to {save_tree(target, name)}')
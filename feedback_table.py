@@ -0,0 +1,169 @@
+"""
+feedback_table.py - Precomputed Bulls/Cows feedback for every pair of valid codes.
+
+The table holds one byte per (secret, guess) pair, encoded as bulls * 5 + cows,
+for all 5040 valid 4-digit codes. It is built once, written to disk and loaded
+back through a read-only memory map, so every worker shares the same pages.
+
+Codes are addressed by their code_space index. Bulls/Cows feedback is symmetric,
+so table[secret][guess] == table[guess][secret] and a row doubles as a column.
+
+game_logic.calculate_bulls_and_cows remains the reference implementation;
+verify() checks the table against it.
+
+Build the table ahead of time with:
+    python feedback_table.py [path]
+"""
+
+import mmap
+import os
+import sys
+import tempfile
+
+from code_space import CODES, NUM_CODES
+
+# bulls * 5 + cows — 25 slots, 14 of which are reachable.
+NUM_FEEDBACKS = 25
+WIN_FEEDBACK = 4 * 5
+
+DEFAULT_PATH = os.environ.get(
+    'FEEDBACK_TABLE_PATH',
+    os.path.join(tempfile.gettempdir(), 'bulls_cows_feedback.bin'),
+)
+
+_table = None
+_array = None
+
+
+def encode_feedback(bulls, cows):
+    """Pack a (bulls, cows) pair into a single feedback byte."""
+    return bulls * 5 + cows
+
+
+def decode_feedback(code):
+    """Unpack a feedback byte into (bulls, cows)."""
+    return divmod(code, 5)
+
+
+def build_table():
+    """
+    Compute the full feedback table and return it as bytes (row = guess).
+
+    Each row is assembled with byte-lane arithmetic on Python ints: one lane
+    per secret, holding 4 * (digits in place) + (digits shared), which is
+    exactly bulls * 5 + cows. Lanes never exceed 20, so no carries occur.
+    """
+    def lanes(flags):
+        return int.from_bytes(bytes(flags), 'little')
+
+    in_position = [
+        [lanes(code[pos] == str(d) for code in CODES) for d in range(10)]
+        for pos in range(4)
+    ]
+    contains = [lanes(str(d) in code for code in CODES) for d in range(10)]
+
+    rows = []
+    for guess in CODES:
+        digits = [int(ch) for ch in guess]
+        bulls = sum(in_position[pos][d] for pos, d in enumerate(digits))
+        shared = sum(contains[d] for d in digits)
+        rows.append((4 * bulls + shared).to_bytes(NUM_CODES, 'little'))
+    return b''.join(rows)
+
+
+def save_table(path=DEFAULT_PATH):
+    """Build the table and write it atomically to 'path'. Returns the path."""
+    data = build_table()
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as fh:
+        fh.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_table(path=DEFAULT_PATH):
+    """
+    Memory-map the table at 'path', building it first if it is missing or
+    has the wrong size.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) != NUM_CODES * NUM_CODES:
+        save_table(path)
+    with open(path, 'rb') as fh:
+        return mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def get_table():
+    """Return the process-wide memory-mapped table, loading it on first use."""
+    global _table
+    if _table is None:
+        _table = load_table()
+    return _table
+
+
+def get_array():
+    """
+    Return the table as a read-only (5040, 5040) NumPy uint8 array backed by
+    the same memory map. Requires NumPy; the pure-Python API does not.
+    """
+    global _array
+    if _array is None:
+        import numpy as np
+
+        _array = np.frombuffer(get_table(), dtype=np.uint8).reshape(NUM_CODES, NUM_CODES)
+    return _array
+
+
+def use_buffer(buf):
+    """
+    Serve the table from the start of 'buf' (e.g. a shared memory block,
+    which may be rounded up to whole pages) instead of DEFAULT_PATH.
+    use_buffer(None) releases the buffer.
+    """
+    global _table, _array
+    _array = None
+    if isinstance(_table, memoryview):
+        _table.release()
+    if buf is None:
+        _table = None
+        return
+    if len(buf) < NUM_CODES * NUM_CODES:
+        raise ValueError('Buffer is too small for the feedback table.')
+    _table = memoryview(buf)[:NUM_CODES * NUM_CODES]
+
+
+def feedback(secret_idx, guess_idx):
+    """Feedback byte for a secret/guess pair given by code index."""
+    if _table is None and not os.path.exists(DEFAULT_PATH):
+        # A cold process (empty temp dir) does not build the whole table
+        # just to score one pair; it is built once the solver needs rows.
+        secret, guess = CODES[secret_idx], CODES[guess_idx]
+        bulls = sum(s == g for s, g in zip(secret, guess))
+        return encode_feedback(bulls, len(set(secret) & set(guess)) - bulls)
+    return get_table()[secret_idx * NUM_CODES + guess_idx]
+
+
+def feedback_row(guess_idx):
+    """Feedback bytes of 'guess_idx' against every secret, indexed by secret."""
+    start = guess_idx * NUM_CODES
+    # Slicing the mmap already gives bytes; a shared memory buffer gives a view.
+    return bytes(get_table()[start:start + NUM_CODES])
+
+
+def verify(table=None):
+    """Check every entry against calculate_bulls_and_cows. Returns True if all match."""
+    from game_logic import calculate_bulls_and_cows
+
+    table = get_table() if table is None else table
+    for g, guess in enumerate(CODES):
+        row = table[g * NUM_CODES:(g + 1) * NUM_CODES]
+        for s, secret in enumerate(CODES):
+            if row[s] != encode_feedback(*calculate_bulls_and_cows(secret, guess)):
+                return False
+    return True
+
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH
+    print(f'Wrote feedback table to {save_table(target)}')
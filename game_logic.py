@@ -2,6 +2,10 @@
 game_logic.py - Core game logic for Bulls or Cows
 """
 
+from feedback_table import decode_feedback, feedback
+
+DIGIT_SET = frozenset('0123456789')
+
 
 def validate_number(number_str):
     """
@@ -16,7 +20,8 @@ def validate_number(number_str):
     if len(number_str) != 4:
         return False, "Number must be exactly 4 digits."
 
-    if not number_str.isdigit():
+    # str.isdigit() also accepts other scripts' digits, which are not codes.
+    if not DIGIT_SET.issuperset(number_str):
         return False, "Number must contain digits only."
 
     if len(set(number_str)) != 4:
@@ -48,4 +53,15 @@ def calculate_bulls_and_cows(secret, guess):
 
 def is_winner(bulls):
     """Check if the player has won (4 bulls = all digits correct)."""
-    return bulls == 4
\ No newline at end of file
+    return bulls == 4
+
+
+def score_indices(secret_idx, guess_idx):
+    """
+    Bulls and Cows for a secret/guess pair given as code_space indices.
+    Reads the precomputed feedback table; equivalent to
+    calculate_bulls_and_cows(CODES[secret_idx], CODES[guess_idx]).
+
+    Returns (bulls: int, cows: int)
+    """
+    return decode_feedback(feedback(secret_idx, guess_idx))
@@ -0,0 +1,149 @@
+"""
+guess_cache.py - In-process cache with single-flight for live guess searches.
+
+Popular histories (say '0123' answered with 0 bulls 1 cow, for a strategy
+without a decision tree) are searched again and again, often by concurrent
+requests. AIBrainHard.choose_guess routes its live searches through CACHE:
+
+- finished searches land in a bounded LRU keyed by the canonical history
+- while a search is running, identical requests wait for it instead of
+  starting their own (single-flight), up to their own deadline; if it fails
+  or ends incomplete (degraded or cut short), they search for themselves
+
+The key is the strategy plus the history's entries in sorted order: the
+candidate set and guessed set, and so the answer, do not depend on the order
+the guesses were played in. Only complete searches are cached; a search cut
+short by a time budget is never shared. Size with GUESS_CACHE_SIZE
+(0 disables). Hits, misses and coalesced waits are counted here and in
+metrics.GUESS_CACHE.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import metrics
+from code_space import as_index
+
+DEFAULT_MAX_ENTRIES = 10000
+
+
+def history_key(strategy, history):
+    """Canonical cache key for a strategy and a list of {guess, bulls, cows}."""
+    return strategy, tuple(sorted((as_index(e['guess']), e['bulls'], e['cows']) for e in history))
+
+
+class _Flight:
+    """A computation in progress that other callers can wait on."""
+
+    __slots__ = ('done', 'result', 'error', 'shared')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.shared = False   # whether the result passed cacheable() and may be handed to waiters
+
+
+class SingleFlightLRU:
+    """Thread-safe LRU cache that runs at most one computation per key at a time."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries = OrderedDict()   # key -> value, least recently used first
+        self._inflight = {}             # key -> _Flight
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Cached value for 'key' or None, counting a hit or miss."""
+        if not self.max_entries:
+            return None
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        metrics.GUESS_CACHE.inc('miss' if value is None else 'hit')
+        return value
+
+    def put(self, key, value):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute, cacheable=lambda value: True, timeout=None):
+        """
+        Return (value, outcome): the cached value ('hit'), the result of a
+        computation already running for 'key' ('coalesced'), or compute()'s
+        result ('miss'), cached if cacheable(value). A running computation
+        that fails or whose result is not cacheable is not shared: its
+        waiters run compute() themselves. Waiting on a running computation gives up
+        after 'timeout' seconds (None: never) with (None, 'timeout').
+        """
+        if not self.max_entries:
+            return compute(), 'miss'
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                outcome = 'hit'
+            else:
+                flight = self._inflight.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._inflight[key] = _Flight()
+                    self.misses += 1
+                    outcome = 'miss'
+                else:
+                    self.coalesced += 1
+                    outcome = 'coalesced'
+        metrics.GUESS_CACHE.inc(outcome)
+        if outcome == 'hit':
+            return value, outcome
+
+        if not leader:
+            if not flight.done.wait(timeout):
+                return None, 'timeout'
+            if flight.error is None and flight.shared:
+                return flight.result, outcome
+            # Someone else's failure or result (e.g. cut short by their budget) does not answer this caller.
+            value = compute()
+            if cacheable(value):
+                self.put(key, value)
+            return value, 'miss'
+
+        try:
+            flight.result = compute()
+            flight.shared = cacheable(flight.result)
+            # Cache before leaving the in-flight table, so there is no gap
+            # in which a new caller would start the same computation.
+            if flight.shared:
+                self.put(key, flight.result)
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+        return flight.result, outcome
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+CACHE = SingleFlightLRU(int(os.environ.get('GUESS_CACHE_SIZE', DEFAULT_MAX_ENTRIES)))
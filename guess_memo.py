@@ -0,0 +1,163 @@
+"""
+guess_memo.py - Persistent memo of live-search results, shared on disk.
+
+guess_cache only helps within one process; every gunicorn worker, restart or
+new lambda instance would search the same positions again. MEMO keeps the
+answer of every complete live search in a SQLite file (WAL mode, so all
+workers on a host read and write it concurrently) and is consulted before
+searching, so a warm restart answers most AI turns without any search.
+
+Key: a 16-byte BLAKE2 fingerprint of the candidate bitset, the guessed codes
+(they change the eval pool) and the strategy name with ai_solver's
+SOLVER_VERSION, so a solver change never reads stale answers.
+
+Writes, and the last-used times of hits, are batched in memory and flushed
+every BATCH_SIZE changes or FLUSH_SECONDS, and at exit. On flush, rows
+beyond max_rows are evicted least recently used first. SQLite errors never
+fail a turn: the memo is skipped and the error counted in
+metrics.GUESS_MEMO.
+
+GUESS_MEMO=0 (or ENABLED = False) disables it; GUESS_MEMO_PATH and
+GUESS_MEMO_MAX_ROWS configure the file and its size cap.
+"""
+
+import atexit
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import metrics
+from candidate_sets import NUM_BYTES
+
+DEFAULT_PATH = os.environ.get(
+    'GUESS_MEMO_PATH',
+    os.path.join(tempfile.gettempdir(), 'bulls_cows_guess_memo.sqlite3'),
+)
+DEFAULT_MAX_ROWS = 200000
+
+ENABLED = os.environ.get('GUESS_MEMO', '1') != '0'
+
+
+def fingerprint(candidate_bits, guessed_set, strategy_version):
+    """16-byte key for a search over 'candidate_bits' with 'guessed_set' played."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(strategy_version.encode('ascii') + b'\0')
+    digest.update(candidate_bits.to_bytes(NUM_BYTES, 'little'))
+    digest.update(b''.join(g.to_bytes(2, 'little') for g in sorted(guessed_set)))
+    return digest.digest()
+
+
+class GuessMemo:
+    """SQLite-backed map of search fingerprint -> (guess, pool_size)."""
+
+    BATCH_SIZE = 64
+    FLUSH_SECONDS = 5.0
+    # Eviction trims to this fraction of max_rows, so it does not run every flush.
+    EVICT_TO = 0.9
+
+    def __init__(self, path, max_rows=DEFAULT_MAX_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pending = {}      # fingerprint -> (guess, pool_size) not yet written
+        self._touched = set()   # fingerprints read since the last flush
+        self._last_flush = time.monotonic()
+
+    def _connect(self):
+        """This thread's connection, opened (and the table created) on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS memo (key BLOB PRIMARY KEY, guess INTEGER NOT NULL, '
+                    'pool_size INTEGER NOT NULL, used REAL NOT NULL) WITHOUT ROWID'
+                )
+                conn.execute('CREATE INDEX IF NOT EXISTS memo_used ON memo (used)')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, candidate_bits, guessed_set, strategy_version):
+        """(guess, pool_size) memoized for this search, or None."""
+        if not ENABLED:
+            return None
+        key = fingerprint(candidate_bits, guessed_set, strategy_version)
+        with self._lock:
+            row = self._pending.get(key)
+        if row is None:
+            try:
+                row = self._connect().execute(
+                    'SELECT guess, pool_size FROM memo WHERE key = ?', (key,),
+                ).fetchone()
+            except sqlite3.Error:
+                metrics.GUESS_MEMO.inc('error')
+                return None
+        if row is None:
+            metrics.GUESS_MEMO.inc('miss')
+            return None
+        metrics.GUESS_MEMO.inc('hit')
+        with self._lock:
+            self._touched.add(key)
+        self._maybe_flush()
+        return tuple(row)
+
+    def put(self, candidate_bits, guessed_set, strategy_version, guess, pool_size):
+        """Queue a search result for the next batched write."""
+        if not ENABLED:
+            return
+        key = fingerprint(candidate_bits, guessed_set, strategy_version)
+        with self._lock:
+            self._pending[key] = (guess, pool_size)
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        with self._lock:
+            due = (
+                len(self._pending) + len(self._touched) >= self.BATCH_SIZE
+                or time.monotonic() - self._last_flush >= self.FLUSH_SECONDS
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write queued results and last-used times, then evict beyond max_rows."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            touched, self._touched = self._touched - pending.keys(), set()
+            self._last_flush = time.monotonic()
+        if not pending and not touched:
+            return
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO memo (key, guess, pool_size, used) VALUES (?, ?, ?, ?)',
+                    [(key, guess, pool_size, now) for key, (guess, pool_size) in pending.items()],
+                )
+                conn.executemany('UPDATE memo SET used = ? WHERE key = ?', [(now, key) for key in touched])
+                rows = conn.execute('SELECT COUNT(*) FROM memo').fetchone()[0]
+                if rows > self.max_rows:
+                    excess = rows - int(self.max_rows * self.EVICT_TO)
+                    conn.execute(
+                        'DELETE FROM memo WHERE key IN (SELECT key FROM memo ORDER BY used LIMIT ?)', (excess,),
+                    )
+                    metrics.GUESS_MEMO.inc('evicted', amount=excess)
+            if pending:
+                metrics.GUESS_MEMO.inc('written', amount=len(pending))
+        except sqlite3.Error:
+            metrics.GUESS_MEMO.inc('error')
+
+    def __len__(self):
+        self.flush()
+        return self._connect().execute('SELECT COUNT(*) FROM memo').fetchone()[0]
+
+
+MEMO = GuessMemo(DEFAULT_PATH, int(os.environ.get('GUESS_MEMO_MAX_ROWS', DEFAULT_MAX_ROWS)))
+atexit.register(MEMO.flush)
@@ -0,0 +1,38 @@
+"""
+gunicorn.conf.py - Pre-forking production server for app.py.
+
+    gunicorn app:app
+
+The app is imported once in the master (preload_app) and preload.warm() maps
+the solver tables and freezes the heap before any worker forks, so all
+workers share one copy of the solver data. Each worker logs its resident and
+shared memory when it exits, and exports it on /metrics. Importing the app
+in the master also creates admission.GATE there, so its ADMISSION_SLOTS
+bound live searches across all workers together.
+
+Workers do not share memory-backed sessions, so SESSION_BACKEND defaults to
+'sqlite' here. WEB_CONCURRENCY sets the worker count and BIND the address.
+"""
+
+import multiprocessing
+import os
+
+os.environ.setdefault('SESSION_BACKEND', 'sqlite')
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+
+
+def when_ready(server):
+    import metrics
+    import preload
+
+    preload.warm()
+    server.log.info('Solver data preloaded (%s): %s', metrics.startup_report(), metrics.memory_report())
+
+
+def worker_exit(server, worker):
+    import metrics
+
+    server.log.info('Worker %s memory: %s', worker.pid, metrics.memory_report())
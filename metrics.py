@@ -0,0 +1,292 @@
+"""
+metrics.py - Lightweight in-process metrics with Prometheus text output.
+
+Histograms and counters are plain Python objects guarded by a lock; an
+observation is a bisect plus a few integer adds, cheap enough to leave on in
+production. Values are per process: with several workers, each one serves
+its own /metrics and the scraper aggregates.
+
+Solver phases timed under bulls_cows_phase_seconds{phase=...}:
+    session_load   Flask session deserialization (cookie verify + decode)
+    session_save   session serialization and cookie re-signing
+    tree_lookup    decision-tree walk in AIBrainHard
+    memo           persistent guess memo lookup (guess_memo)
+    daemon         round trip to the solver daemon (solver_client)
+    candidates     loading/migrating the candidate set from solver state
+    search         live guess search (search_next_guess)
+
+Startup stages (imports, data loading, app setup) are timed once per process
+with startup_stage() into bulls_cows_startup_seconds{stage=...}, and kept in
+STARTUP for the cold-start log line and benchmarks/cold_start.py.
+
+bulls_cows_memory_bytes{kind=...} is read from /proc/self/smaps_rollup at
+each scrape: rss, pss, and the resident pages shared with other processes
+(e.g. forked workers, see preload) versus private to this one.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+POOL_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5040)
+
+REGISTRY = []
+
+
+def _format_labels(labelnames, labelvalues, extra=()):
+    pairs = list(zip(labelnames, labelvalues)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in pairs) + '}'
+
+
+class Counter:
+    """Monotonic counter, optionally split by label values."""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def values(self):
+        """Current value per label-value tuple."""
+        with self._lock:
+            return dict(self._values)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labelvalues, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, labelvalues)} {value}')
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram, optionally split by label values."""
+
+    def __init__(self, name, documentation, buckets, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value, *labelvalues):
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][slot] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labelvalues, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets + ('+Inf',), counts):
+                    cumulative += n
+                    labels = _format_labels(self.labelnames, labelvalues, [('le', bound)])
+                    lines.append(f'{self.name}_bucket{labels} {cumulative}')
+                labels = _format_labels(self.labelnames, labelvalues)
+                lines.append(f'{self.name}_sum{labels} {total}')
+                lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Gauge:
+    """Point-in-time values, read from collect() -> {labelvalues: value} at each render."""
+
+    def __init__(self, name, documentation, collect, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.collect = collect
+        self.labelnames = tuple(labelnames)
+        REGISTRY.append(self)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} gauge']
+        for labelvalues, value in sorted(self.collect().items()):
+            lines.append(f'{self.name}{_format_labels(self.labelnames, labelvalues)} {value}')
+        return lines
+
+
+PHASE_SECONDS = Histogram(
+    'bulls_cows_phase_seconds', 'Time spent per AI turn phase.', LATENCY_BUCKETS, ['phase'],
+)
+REQUEST_SECONDS = Histogram(
+    'bulls_cows_request_seconds', 'Request latency by endpoint.', LATENCY_BUCKETS, ['endpoint'],
+)
+CANDIDATE_POOL = Histogram(
+    'bulls_cows_candidate_pool_size', 'Candidates remaining when the AI searches for a guess.', POOL_BUCKETS,
+)
+SEARCH_EVALUATIONS = Counter(
+    'bulls_cows_search_evaluations_total', 'Guesses scored, pruned early or skipped by live search.', ['kind'],
+)
+GUESS_SOURCE = Counter(
+    'bulls_cows_guesses_total', 'AI guesses by how they were chosen.', ['source'],
+)
+GUESS_CACHE = Counter(
+    'bulls_cows_guess_cache_total', 'Live-search lookups in the in-process guess cache by outcome (hit, miss, coalesced).',
+    ['outcome'],
+)
+GUESS_MEMO = Counter(
+    'bulls_cows_guess_memo_total',
+    'Persistent guess memo operations by outcome (hit, miss, written, evicted, error).',
+    ['outcome'],
+)
+ADMISSION = Counter(
+    'bulls_cows_admission_total',
+    'Live searches by admission outcome (admitted, queued, expired, overloaded, degraded).',
+    ['outcome'],
+)
+SOLVER_DAEMON = Counter(
+    'bulls_cows_solver_daemon_total',
+    'Searches sent to the solver daemon by outcome (ok, overloaded, expired, timeout, unavailable, error, bad_request).',
+    ['outcome'],
+)
+SPECULATION = Counter(
+    'bulls_cows_speculation_total',
+    'Background next-guess searches by outcome (hit, waited, timeout, queued, stale, miss, replaced, evicted, expired).',
+    ['outcome'],
+)
+MEMORY_BYTES = Gauge(
+    'bulls_cows_memory_bytes', 'Resident memory of this process by kind (rss, pss, shared, private).',
+    lambda: {(kind,): value for kind, value in memory_usage().items()}, ['kind'],
+)
+STARTUP_SECONDS = Histogram(
+    'bulls_cows_startup_seconds', 'Time spent per startup stage of this process.', LATENCY_BUCKETS, ['stage'],
+)
+
+# Startup stage -> seconds for this process, in the order the stages ran.
+STARTUP = {}
+
+
+@contextmanager
+def timed(histogram, *labelvalues):
+    """Observe the wall time of the block in 'histogram'."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start, *labelvalues)
+
+
+@contextmanager
+def startup_stage(stage):
+    """Time one startup stage into STARTUP and STARTUP_SECONDS."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STARTUP[stage] = STARTUP.get(stage, 0.0) + elapsed
+        STARTUP_SECONDS.observe(elapsed, stage)
+
+
+def startup_report():
+    """One-line summary of STARTUP, e.g. 'flask 180.2ms | solver 12.0ms | total 192.2ms'."""
+    parts = [f'{stage} {seconds * 1000:.1f}ms' for stage, seconds in STARTUP.items()]
+    parts.append(f'total {sum(STARTUP.values()) * 1000:.1f}ms')
+    return ' | '.join(parts)
+
+
+def memory_usage(pid='self'):
+    """
+    Memory of process 'pid' in bytes from /proc/<pid>/smaps_rollup: rss,
+    pss, shared and private. Empty where smaps_rollup is unavailable.
+    """
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as fh:
+            lines = fh.readlines()
+    except OSError:
+        return {}
+    kb = {}
+    for line in lines:
+        parts = line.split()
+        if len(parts) == 3 and parts[2] == 'kB':
+            kb[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': kb.get('Rss', 0) * 1024,
+        'pss': kb.get('Pss', 0) * 1024,
+        'shared': (kb.get('Shared_Clean', 0) + kb.get('Shared_Dirty', 0)) * 1024,
+        'private': (kb.get('Private_Clean', 0) + kb.get('Private_Dirty', 0)) * 1024,
+    }
+
+
+def memory_report(pid='self'):
+    """One-line summary of memory_usage(), e.g. 'rss 61.2MB | shared 48.0MB | private 13.2MB | pss 25.1MB'."""
+    usage = memory_usage(pid)
+    if not usage:
+        return 'unavailable'
+    return ' | '.join(f'{kind} {usage[kind] / 2 ** 20:.1f}MB' for kind in ('rss', 'shared', 'private', 'pss'))
+
+
+def record_search(result):
+    """Count an ai_solver.SearchResult's source and evaluation counters."""
+    GUESS_SOURCE.inc(result.source)
+    if result.evaluated:
+        SEARCH_EVALUATIONS.inc('evaluated', amount=result.evaluated)
+    if result.pruned:
+        SEARCH_EVALUATIONS.inc('pruned', amount=result.pruned)
+    if result.skipped:
+        SEARCH_EVALUATIONS.inc('skipped', amount=result.skipped)
+
+
+def render():
+    """All registered metrics in Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+class TimedSessionInterface:
+    """
+    Wraps a Flask session interface to time loading and saving sessions.
+    Everything else is delegated, so any session backend can be wrapped.
+    """
+
+    def __init__(self, inner):
+        self.inner = inner
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def open_session(self, app, request):
+        with timed(PHASE_SECONDS, 'session_load'):
+            return self.inner.open_session(app, request)
+
+    def save_session(self, app, session, response):
+        with timed(PHASE_SECONDS, 'session_save'):
+            return self.inner.save_session(app, session, response)
+
+
+def instrument_app(app):
+    """Time session handling and every request of a Flask app."""
+    from flask import g, request
+
+    app.session_interface = TimedSessionInterface(app.session_interface)
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.teardown_request
+    def _stop_timer(exc=None):
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            REQUEST_SECONDS.observe(time.perf_counter() - start, request.endpoint or 'unknown')
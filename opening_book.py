@@ -0,0 +1,160 @@
+"""
+opening_book.py - Precomputed solver state after the opener, for cold starts.
+
+Every game opens with '0123', so the candidate set after each of its 14
+possible feedbacks, and the second guess every strategy picks from there, are
+known ahead of time. Loading the book at import seeds the candidate_sets
+cache for the opener (the first /ai-feedback then needs no feedback table)
+and answers the second guess for strategies without a decision tree, which
+would otherwise cost a full live search on a cold process.
+
+Serialized format (all integers little-endian):
+    header      b'BCOB', version byte, uint16 opener, strategy count byte,
+                then per strategy a name length byte and the name (ASCII)
+    candidates  per candidate_sets.REACHABLE_FEEDBACKS slot, the candidate
+                bitset (candidate_sets.NUM_BYTES bytes)
+    guesses     per strategy, per slot, the uint16 second guess
+                (0xFFFF for the winning feedback)
+
+Rebuild after any change to get_next_guess with:
+    python opening_book.py [path]
+"""
+
+import os
+import struct
+import sys
+
+import candidate_sets
+from code_space import as_index
+from feedback_table import WIN_FEEDBACK, encode_feedback
+from strategies import STRATEGIES
+
+MAGIC = b'BCOB'
+FORMAT_VERSION = 1
+
+DEFAULT_PATH = os.environ.get(
+    'OPENING_BOOK_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'opening_book.bin'),
+)
+
+# Set OPENING_BOOK=0 (or ENABLED = False) to search live on the second turn.
+ENABLED = os.environ.get('OPENING_BOOK', '1') != '0'
+
+NO_GUESS = 0xFFFF
+
+_book = None
+_book_loaded = False
+
+
+def build_book():
+    """
+    Compute the book. Returns (opener, {feedback_byte: bitset},
+    {strategy: {feedback_byte: second_guess}}).
+    """
+    from ai_solver import OPENER, get_next_guess
+
+    candidates = {
+        fb: candidate_sets.consistent_with(OPENER, *divmod(fb, 5))
+        for fb in candidate_sets.REACHABLE_FEEDBACKS
+    }
+    guesses = {}
+    for name in STRATEGIES:
+        guesses[name] = {
+            fb: get_next_guess(candidate_sets.to_indices(bits), {OPENER}, name)
+            for fb, bits in candidates.items()
+            if fb != WIN_FEEDBACK
+        }
+    return OPENER, candidates, guesses
+
+
+def serialize(book):
+    """Encode a book from build_book() into the binary format."""
+    opener, candidates, guesses = book
+    out = bytearray(MAGIC + bytes([FORMAT_VERSION]) + struct.pack('<HB', opener, len(guesses)))
+    for name in guesses:
+        encoded = name.encode('ascii')
+        out += bytes([len(encoded)]) + encoded
+    for fb in candidate_sets.REACHABLE_FEEDBACKS:
+        out += candidates[fb].to_bytes(candidate_sets.NUM_BYTES, 'little')
+    for name in guesses:
+        for fb in candidate_sets.REACHABLE_FEEDBACKS:
+            out += struct.pack('<H', guesses[name].get(fb, NO_GUESS))
+    return bytes(out)
+
+
+def deserialize(data):
+    """Decode serialized bytes into the build_book() tuple."""
+    if data[:4] != MAGIC or data[4] != FORMAT_VERSION:
+        raise ValueError('Not an opening book file, or unsupported version.')
+    opener, count = struct.unpack_from('<HB', data, 5)
+    offset = 8
+    names = []
+    for _ in range(count):
+        length = data[offset]
+        names.append(data[offset + 1:offset + 1 + length].decode('ascii'))
+        offset += 1 + length
+
+    candidates = {}
+    for fb in candidate_sets.REACHABLE_FEEDBACKS:
+        candidates[fb] = int.from_bytes(data[offset:offset + candidate_sets.NUM_BYTES], 'little')
+        offset += candidate_sets.NUM_BYTES
+
+    guesses = {}
+    for name in names:
+        guesses[name] = {}
+        for fb in candidate_sets.REACHABLE_FEEDBACKS:
+            (guess,) = struct.unpack_from('<H', data, offset)
+            offset += 2
+            if guess != NO_GUESS:
+                guesses[name][fb] = guess
+    return opener, candidates, guesses
+
+
+def save_book(path=DEFAULT_PATH):
+    """Build the book and write it to 'path'. Returns the path."""
+    data = serialize(build_book())
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'wb') as fh:
+        fh.write(data)
+    return path
+
+
+def get_book():
+    """Return the shipped book (see build_book), or None if no book file exists."""
+    global _book, _book_loaded
+    if not _book_loaded:
+        # Set the flag only after loading, so a concurrent caller never
+        # sees a missing book while the file is read.
+        if os.path.exists(DEFAULT_PATH):
+            with open(DEFAULT_PATH, 'rb') as fh:
+                _book = deserialize(fh.read())
+        _book_loaded = True
+    return _book
+
+
+def preload():
+    """Load the book and seed the candidate_sets cache with the opener's entries."""
+    book = get_book()
+    if book is None:
+        return False
+    opener, candidates, _ = book
+    for fb, bits in candidates.items():
+        candidate_sets.prime(opener, *divmod(fb, 5), bits)
+    return True
+
+
+def lookup(history, strategy):
+    """
+    Second guess for a history holding just the opener and its feedback, or
+    None when the book does not cover it.
+    """
+    book = get_book() if ENABLED and len(history) == 1 else None
+    if book is None or as_index(history[0]['guess']) != book[0]:
+        return None
+    fb = encode_feedback(history[0]['bulls'], history[0]['cows'])
+    return book[2].get(strategy, {}).get(fb)
+
+
+if __name__ == '__main__':
+    target = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_PATH
+    print(f'Wrote opening book to {save_book(target)}')
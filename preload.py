@@ -0,0 +1,147 @@
+"""
+preload.py - Build the solver's lookup data once, before workers fork.
+
+Under a pre-forking server (gunicorn with preload_app, see gunicorn.conf.py)
+the master calls warm() after importing the app: it maps the feedback and
+consistency tables (building any that are missing), loads the decision tree
+and opening book, then gc.freeze()s the heap. The large structures are
+read-only buffers (mmap, array) rather than Python containers, so reading
+them never writes a refcount and forked workers keep sharing their pages;
+freezing stops the collector from writing to the remaining objects.
+
+Spawn-based servers do not inherit the parent's memory. There the parent
+calls share(), which copies both tables into multiprocessing.shared_memory
+blocks and exports SOLVER_SHARED_MEMORY; attach_from_env() (run by app at
+import) then serves the tables from those blocks in every worker.
+
+Per-process memory is exported on /metrics as bulls_cows_memory_bytes. For a
+running server, report the master and each worker with:
+    python preload.py [master_pid]
+"""
+
+import atexit
+import gc
+import os
+import sys
+from multiprocessing import shared_memory
+
+import candidate_sets
+import decision_tree
+import feedback_table
+import metrics
+import opening_book
+
+SHARED_MEMORY_ENV = 'SOLVER_SHARED_MEMORY'
+
+# Shared memory blocks created or attached by this process; closing them
+# while the tables still reference their buffers would fail.
+_blocks = {}
+
+
+def warm(freeze=True):
+    """Load every solver table into this process and, with 'freeze', gc.freeze() it."""
+    with metrics.startup_stage('preload'):
+        feedback_table.get_table()
+        candidate_sets.get_table(build=True)
+        decision_tree.get_tree()
+        opening_book.preload()
+    if freeze:
+        gc.collect()
+        gc.freeze()
+
+
+def share(prefix=None):
+    """
+    Copy the feedback and consistency tables into shared memory blocks
+    '<prefix>_feedback' and '<prefix>_consistency', and export the prefix
+    in SOLVER_SHARED_MEMORY for child processes. The blocks are unlinked
+    when this process exits. Returns the prefix.
+    """
+    prefix = prefix or f'bulls_cows_{os.getpid()}'
+    tables = (('feedback', feedback_table.get_table()), ('consistency', candidate_sets.get_table(build=True)))
+    for suffix, table in tables:
+        block = shared_memory.SharedMemory(f'{prefix}_{suffix}', create=True, size=len(table))
+        block.buf[:len(table)] = table
+        _blocks[block.name] = block
+        atexit.register(block.unlink)
+    os.environ[SHARED_MEMORY_ENV] = prefix
+    return prefix
+
+
+def _open_block(name):
+    """Attach to an existing block without letting this process unlink it at exit."""
+    if name not in _blocks:
+        try:
+            block = shared_memory.SharedMemory(name, track=False)   # Python 3.13+
+        except TypeError:
+            # Older versions always register the block for unlinking at exit,
+            # and unregistering it again would also drop the owner's entry
+            # when both share a resource tracker; skip the registration.
+            from multiprocessing import resource_tracker
+
+            register = resource_tracker.register
+            resource_tracker.register = lambda name, rtype: None
+            try:
+                block = shared_memory.SharedMemory(name)
+            finally:
+                resource_tracker.register = register
+        _blocks[name] = block
+    return _blocks[name]
+
+
+def _detach():
+    """Drop the tables' views of attached blocks so the blocks can close cleanly."""
+    try:
+        feedback_table.use_buffer(None)
+        candidate_sets.use_buffer(None)
+        for block in _blocks.values():
+            block.close()
+    except BufferError:
+        pass   # something still holds a view; the OS unmaps the blocks at exit anyway
+
+
+def attach(prefix):
+    """Serve the solver tables from the shared memory blocks published by share(prefix)."""
+    feedback_table.use_buffer(_open_block(f'{prefix}_feedback').buf)
+    candidate_sets.use_buffer(_open_block(f'{prefix}_consistency').buf)
+    atexit.register(_detach)
+
+
+def attach_from_env():
+    """attach() to the blocks named by SOLVER_SHARED_MEMORY, if set. Returns whether it did."""
+    prefix = os.environ.get(SHARED_MEMORY_ENV)
+    if prefix:
+        attach(prefix)
+    return bool(prefix)
+
+
+def _children(pid):
+    """PIDs whose parent is 'pid'."""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as fh:
+                # Fields after the parenthesised command name: state, ppid, ...
+                ppid = int(fh.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return sorted(children)
+
+
+def report(pid):
+    """Lines of resident versus shared memory for 'pid' and each of its child processes."""
+    lines = [f'master {pid}: {metrics.memory_report(pid)}']
+    lines.extend(f'worker {child}: {metrics.memory_report(child)}' for child in _children(pid))
+    return lines
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        print('\n'.join(report(int(sys.argv[1]))))
+    else:
+        warm()
+        print(f'preloaded in this process: {metrics.memory_report()}')
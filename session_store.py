@@ -0,0 +1,222 @@
+"""
+session_store.py - Server-side game sessions for Flask.
+
+Instead of serializing the whole game into Flask's signed cookie (which grows
+every turn and is re-signed and re-uploaded on every request), the cookie
+only carries a random game ID and the state lives in a pluggable store:
+
+- MemoryStore   in-process LRU with a TTL; fastest, single-process only
+- SQLiteStore   shared SQLite file (WAL mode) for multi-worker setups
+
+Idle games expire once they have not been saved for the TTL. The IDs are
+128-bit random tokens, so they are not guessable and need no signature.
+
+Game states are stored in state_codec's compact binary form (JSON for
+anything it cannot represent); both formats are read back transparently.
+
+Configure with configure_sessions(app); the SESSION_BACKEND environment
+variable picks 'cookie' (Flask's signed cookie, carrying the compact state),
+'memory' or 'sqlite'.
+"""
+
+import json
+import os
+import secrets
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+import state_codec
+
+DEFAULT_TTL_SECONDS = 6 * 3600
+DEFAULT_MAX_GAMES = 10000
+
+
+def dumps(data):
+    """Serialize a session dict for storage: compact binary if possible, else JSON."""
+    try:
+        return state_codec.encode(data)
+    except ValueError:
+        return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+
+def loads(blob):
+    """Inverse of dumps(); also reads sessions stored as JSON."""
+    return state_codec.decode(blob)
+
+
+class MemoryStore:
+    """Thread-safe in-process LRU of serialized sessions with a TTL."""
+
+    def __init__(self, max_games=DEFAULT_MAX_GAMES, ttl=DEFAULT_TTL_SECONDS):
+        self.max_games = max_games
+        self.ttl = ttl
+        self._data = OrderedDict()   # sid -> (expires_at, blob), oldest first
+        self._lock = threading.Lock()
+
+    def get(self, sid):
+        with self._lock:
+            entry = self._data.get(sid)
+            if entry is None:
+                return None
+            if entry[0] < time.time():
+                del self._data[sid]
+                return None
+            return entry[1]
+
+    def set(self, sid, blob):
+        now = time.time()
+        with self._lock:
+            self._data.pop(sid, None)
+            self._data[sid] = (now + self.ttl, blob)
+            # Entries are ordered by last save, so expired ones sit at the front.
+            while self._data:
+                oldest_sid, (expires_at, _) = next(iter(self._data.items()))
+                if expires_at >= now and len(self._data) <= self.max_games:
+                    break
+                del self._data[oldest_sid]
+
+    def delete(self, sid):
+        with self._lock:
+            self._data.pop(sid, None)
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteStore:
+    """Sessions in a SQLite file shared by every worker on the host."""
+
+    # Expired rows are swept after this many writes.
+    SWEEP_EVERY = 500
+
+    def __init__(self, path, ttl=DEFAULT_TTL_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._writes = 0
+        # Connections inherited from a forking parent: never used again, and
+        # never closed either, since closing one in the child could checkpoint
+        # or remove the WAL under the parent.
+        self._inherited = []
+
+    def _connect(self):
+        """This thread's connection, opened (and the table created) on first use in this process."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            if conn is not None:
+                self._inherited.append(conn)
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            with conn:
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS sessions '
+                    '(id TEXT PRIMARY KEY, data BLOB NOT NULL, expires REAL NOT NULL)'
+                )
+                conn.execute('CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires)')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, sid):
+        row = self._connect().execute(
+            'SELECT data FROM sessions WHERE id = ? AND expires >= ?', (sid, time.time()),
+        ).fetchone()
+        return row[0] if row else None
+
+    def set(self, sid, blob):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO sessions (id, data, expires) VALUES (?, ?, ?)',
+                (sid, blob, now + self.ttl),
+            )
+            self._writes += 1
+            if self._writes % self.SWEEP_EVERY == 0:
+                conn.execute('DELETE FROM sessions WHERE expires < ?', (now,))
+
+    def delete(self, sid):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM sessions WHERE id = ?', (sid,))
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session dict tied to a game ID; tracks modification like Flask's own."""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """Flask session interface storing session data in a MemoryStore or SQLiteStore."""
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            blob = self.store.get(sid)
+            if blob is not None:
+                return ServerSideSession(loads(blob), sid=sid)
+        return ServerSideSession(sid=secrets.token_urlsafe(16), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if session.modified:
+            self.store.set(session.sid, dumps(dict(session)))
+        if session.new or session.modified:
+            response.set_cookie(
+                name, session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain, path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+
+
+def configure_sessions(app, default='cookie'):
+    """
+    Install the session backend named by SESSION_BACKEND (or 'default'):
+    'cookie' keeps Flask's signed cookie (with the compact state serializer);
+    'memory' and 'sqlite' keep state server-side. SESSION_TTL_SECONDS,
+    SESSION_MAX_GAMES and SESSION_SQLITE_PATH tune the server-side stores.
+    """
+    backend = os.environ.get('SESSION_BACKEND', default)
+    ttl = int(os.environ.get('SESSION_TTL_SECONDS', DEFAULT_TTL_SECONDS))
+
+    if backend == 'cookie':
+        app.session_interface.serializer = state_codec.SessionSerializer()
+        return
+    if backend == 'memory':
+        store = MemoryStore(int(os.environ.get('SESSION_MAX_GAMES', DEFAULT_MAX_GAMES)), ttl)
+    elif backend == 'sqlite':
+        path = os.environ.get(
+            'SESSION_SQLITE_PATH', os.path.join(tempfile.gettempdir(), 'bulls_cows_sessions.sqlite3'),
+        )
+        store = SQLiteStore(path, ttl)
+    else:
+        raise ValueError(f'Unknown session backend: {backend!r}')
+    app.session_interface = ServerSideSessionInterface(store)
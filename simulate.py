@@ -0,0 +1,162 @@
+"""
+simulate.py - Self-play simulator for the hard-mode AI.
+
+Plays AIBrainHard against every valid secret (or a fixed-seed sample), using
+game_logic.calculate_bulls_and_cows as the feedback oracle, across a process
+pool. Reports the guesses-to-solve histogram, worst case, mean, and CPU time
+per AI turn, optionally as a JSON report for tracking regressions.
+
+Usage:
+    python simulate.py [--strategy NAME] [--live] [--processes N]
+                       [--sample N --seed S] [--json report.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import ai_solver
+import decision_tree
+import guess_cache
+import guess_memo
+import opening_book
+import solver_client
+from ai_solver import AIBrainHard
+from code_space import CODES
+from game_logic import calculate_bulls_and_cows, is_winner
+from strategies import DEFAULT_STRATEGY, STRATEGIES
+
+# A correct solver never needs this many guesses; stop runaway games.
+MAX_TURNS = 12
+
+REPORT_VERSION = 1
+
+
+def _init_worker(live):
+    """Process-pool initializer: optionally bypass the decision tree, opening book, guess caches and solver daemon."""
+    if live:
+        decision_tree.ENABLED = False
+        opening_book.ENABLED = False
+        guess_cache.CACHE.max_entries = 0
+        guess_memo.ENABLED = False
+        solver_client.CLIENT = None
+
+
+def play_game(secret, strategy=DEFAULT_STRATEGY):
+    """
+    Play one game against 'secret' (a code string).
+    Returns (guesses_to_solve, [cpu_seconds_per_turn]); guesses is None if
+    the AI failed to solve within MAX_TURNS.
+    """
+    state = AIBrainHard.initial_state(strategy)
+    turn_cpu = []
+    for turn in range(1, MAX_TURNS + 1):
+        start = time.process_time()
+        guess, state = AIBrainHard.make_guess(state)
+        turn_cpu.append(time.process_time() - start)
+
+        bulls, cows = calculate_bulls_and_cows(secret, CODES[guess])
+        state = AIBrainHard.apply_feedback(state, bulls, cows)
+        if is_winner(bulls):
+            return turn, turn_cpu
+    return None, turn_cpu
+
+
+def _play_batch(secrets, strategy):
+    return [(secret,) + play_game(secret, strategy) for secret in secrets]
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def simulate(secrets, strategy=DEFAULT_STRATEGY, processes=None, live=False):
+    """Play every secret in 'secrets' and return the report dict."""
+    processes = processes or os.cpu_count() or 1
+    batches = [secrets[i::processes * 4] for i in range(processes * 4)]
+
+    wall_start = time.perf_counter()
+    with ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(live,)) as pool:
+        games = [
+            game
+            for batch in pool.map(_play_batch, batches, [strategy] * len(batches))
+            for game in batch
+        ]
+    wall = time.perf_counter() - wall_start
+
+    solved = [guesses for _, guesses, _ in games if guesses is not None]
+    failures = sorted(secret for secret, guesses, _ in games if guesses is None)
+    turn_cpu = sorted(t for _, _, cpu in games for t in cpu)
+    histogram = Counter(solved)
+
+    return {
+        'report_version': REPORT_VERSION,
+        'strategy': strategy,
+        'backend': 'numpy' if ai_solver.USE_NUMPY else 'python',
+        'decision_tree': not live and decision_tree.get_tree() is not None,
+        'python': platform.python_version(),
+        'secrets': len(secrets),
+        'solved': len(solved),
+        'failures': failures,
+        'histogram': {str(k): histogram[k] for k in sorted(histogram)},
+        'worst_case': max(solved) if solved else None,
+        'mean_guesses': round(sum(solved) / len(solved), 4) if solved else None,
+        'turn_cpu_ms': {
+            'mean': round(1000 * sum(turn_cpu) / len(turn_cpu), 4) if turn_cpu else 0.0,
+            'p50': round(1000 * _percentile(turn_cpu, 0.50), 4),
+            'p95': round(1000 * _percentile(turn_cpu, 0.95), 4),
+            'max': round(1000 * (turn_cpu[-1] if turn_cpu else 0.0), 4),
+        },
+        'wall_seconds': round(wall, 3),
+        'processes': processes,
+    }
+
+
+def print_report(report):
+    print(f"strategy {report['strategy']} | backend {report['backend']} | "
+          f"decision tree {'on' if report['decision_tree'] else 'off'}")
+    print(f"solved {report['solved']}/{report['secrets']} in {report['wall_seconds']}s "
+          f"on {report['processes']} processes")
+    total = max(report['solved'], 1)
+    for guesses, count in report['histogram'].items():
+        bar = '#' * max(1, round(50 * count / total))
+        print(f'  {guesses:>2} guesses: {count:>5}  {bar}')
+    print(f"mean {report['mean_guesses']} | worst {report['worst_case']}")
+    cpu = report['turn_cpu_ms']
+    print(f"CPU per turn (ms): mean {cpu['mean']} p50 {cpu['p50']} p95 {cpu['p95']} max {cpu['max']}")
+    if report['failures']:
+        print(f"UNSOLVED: {', '.join(report['failures'])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Self-play the hard-mode AI against every secret.')
+    parser.add_argument('--strategy', default=DEFAULT_STRATEGY, choices=sorted(STRATEGIES))
+    parser.add_argument('--live', action='store_true', help='search every turn (ignore the decision tree, opening book and guess caches)')
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--sample', type=int, default=None, help='play a random sample of secrets')
+    parser.add_argument('--seed', type=int, default=2024)
+    parser.add_argument('--json', metavar='PATH', help='also write the report as JSON')
+    args = parser.parse_args(argv)
+
+    secrets = list(CODES)
+    if args.sample:
+        secrets = random.Random(args.seed).sample(secrets, args.sample)
+
+    report = simulate(secrets, args.strategy, args.processes, args.live)
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as fh:
+            json.dump(report, fh, indent=2)
+    return 0 if not report['failures'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+"""
+solver_api.py - Stateless next-guess lookups for GET /solve.
+
+The AI's next guess is a pure function of (solver version, strategy, feedback
+history), so it can be served without session state and cached by any HTTP
+cache. A history is encoded in the query string as consecutive 6-character
+entries, guess digits followed by bulls and cows:
+
+    /solve?h=012301456702&strategy=entropy   ->  0123 (0B 1C), 4567 (0B 2C)
+
+An empty 'h' asks for the opener. Responses carry a strong ETag derived
+from the request alone, so a conditional request is answered with 304
+before any solving, and a year-long immutable Cache-Control: a given URL
+never changes its answer until SOLVER_VERSION is bumped (which changes
+every ETag). For that to hold byte for byte, the body leaves out how the
+guess was found (tree, cache, search...), which varies between calls, and
+a request that cannot get a solver slot in time is answered 503 with
+Cache-Control: no-store rather than with a degraded guess.
+"""
+
+import hashlib
+from collections import Counter
+
+import admission
+import candidate_sets
+from ai_solver import SOLVER_VERSION, AIBrainHard
+from code_space import code_of, index_of
+from feedback_table import decode_feedback, feedback_row
+from game_logic import DIGIT_SET, is_winner, validate_number
+from strategies import DEFAULT_STRATEGY, STRATEGIES
+
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Sent with 503 when every solver slot stays busy past the queue deadline.
+RETRY_AFTER_SECONDS = 1
+
+# A correct solver never needs this many guesses; longer histories are rejected.
+MAX_HISTORY = 12
+
+_ENTRY_LENGTH = 6
+
+
+def parse_history(text):
+    """Decode 'h' into a list of {guess, bulls, cows} (guess as a code index). Raises ValueError."""
+    text = (text or '').strip()
+    if len(text) % _ENTRY_LENGTH:
+        raise ValueError('History must be 6-character entries: 4 guess digits, then bulls and cows.')
+    if len(text) > MAX_HISTORY * _ENTRY_LENGTH:
+        raise ValueError(f'History is limited to {MAX_HISTORY} guesses.')
+
+    history = []
+    for start in range(0, len(text), _ENTRY_LENGTH):
+        guess, bulls, cows = text[start:start + 4], text[start + 4], text[start + 5]
+        valid, msg = validate_number(guess)
+        if not valid:
+            raise ValueError(f'Invalid guess {guess!r}: {msg}')
+        if not DIGIT_SET.issuperset(bulls + cows) or int(bulls) + int(cows) > 4:
+            raise ValueError(f'Invalid bulls/cows for guess {guess!r}.')
+        history.append({'guess': index_of(guess), 'bulls': int(bulls), 'cows': int(cows)})
+    return history
+
+
+def encode_history(history):
+    """Inverse of parse_history(): the canonical 'h' value for a history."""
+    return ''.join(f"{code_of(e['guess'])}{e['bulls']}{e['cows']}" for e in history)
+
+
+def parse_query(args):
+    """(strategy, history) from request query args. Raises ValueError."""
+    strategy = args.get('strategy') or DEFAULT_STRATEGY
+    if strategy not in STRATEGIES:
+        raise ValueError(f'Unknown strategy. Choose one of: {", ".join(STRATEGIES)}.')
+    return strategy, parse_history(args.get('h', ''))
+
+
+def etag(strategy, history):
+    """Strong entity tag for the answer to (strategy, history) under this solver version."""
+    key = f'{SOLVER_VERSION}:{strategy}:{encode_history(history)}'
+    return hashlib.sha256(key.encode('ascii')).hexdigest()[:32]
+
+
+def partition_summary(guess, candidates):
+    """How 'guess' splits 'candidates' by feedback: per-feedback counts, parts and largest part."""
+    row = feedback_row(guess)
+    sizes = Counter(row[c] for c in candidates)
+    return {
+        'parts': len(sizes),
+        'largest': max(sizes.values()),
+        'feedbacks': [
+            {'bulls': decode_feedback(fb)[0], 'cows': decode_feedback(fb)[1], 'count': sizes[fb]}
+            for fb in sorted(sizes)
+        ],
+    }
+
+
+def solve(strategy, history):
+    """Answer a /solve request. Returns (payload, http_status)."""
+    base = {'strategy': strategy, 'history': encode_history(history)}
+    if history and is_winner(history[-1]['bulls']):
+        return {**base, 'success': True, 'solved': True, 'guess': None,
+                'remaining': 1, 'partition': None}, 200
+
+    bits = candidate_sets.from_history(history)
+    remaining = candidate_sets.count(bits)
+    if remaining == 0:
+        return {**base, 'success': False, 'remaining': 0,
+                'error': 'No code is consistent with this history.'}, 422
+
+    state = {
+        'guessed': history,
+        'current_guess': None,
+        'candidates': candidate_sets.encode(bits),
+        'strategy': strategy,
+    }
+    # Answers are cached for a year: never degrade, give up with 503 instead.
+    try:
+        result = AIBrainHard.choose_guess(state, degrade=False, deadline=admission.turn_deadline())
+    except admission.Saturated:
+        return {**base, 'success': False, 'error': 'The solver is busy. Please retry shortly.'}, 503
+    return {
+        **base,
+        'success': True,
+        'solved': False,
+        'guess': code_of(result.guess),
+        'remaining': remaining,
+        'partition': partition_summary(result.guess, candidate_sets.to_indices(bits)),
+    }, 200
+
@@ -0,0 +1,231 @@
+"""
+solver_client.py - Wire protocol and pooled client for the solver daemon.
+
+Long live searches can run in a separate process (solver_daemon.py) so they
+do not hold the web workers' request threads and GIL. AIBrainHard.choose_guess
+asks the daemon through CLIENT whenever a turn needs a live search, and
+searches in-process as before when SOLVER_SOCKET is unset or the daemon is
+unavailable, overloaded or too slow.
+
+Every message is a uint16 length followed by a little-endian payload:
+    request   version, strategy id (state_codec.STRATEGY_IDS), uint32 search
+              budget in ms (0 = none), uint32 queue deadline in ms (0 = none),
+              uint8 n, then n x (uint16 guess index, uint8 feedback byte)
+    response  status, source id (SOURCES), uint16 guess, uint32 evaluated,
+              uint32 pool size, complete flag, uint32 pruned, uint32 skipped
+The guess fields are only meaningful when the status is OK. The queue
+deadline bounds how long the request may wait for a free solver slot; the
+search itself is bounded by its budget, exactly as in-process.
+
+Connections are kept open and reused, up to SOLVER_POOL_SIZE idle ones. A
+refused connection marks the daemon down for SOLVER_RETRY_SECONDS so turns
+do not each pay for a failed connect. Outcomes are counted in
+metrics.SOLVER_DAEMON. Configure with SOLVER_SOCKET, SOLVER_QUEUE_DEADLINE_MS
+and SOLVER_TIMEOUT_MS (the longest a turn waits for an answer); a turn's
+remaining admission deadline (see admission) lowers both.
+"""
+
+import os
+import socket
+import struct
+import threading
+import time
+
+import metrics
+from code_space import NUM_CODES, as_index
+from feedback_table import decode_feedback, encode_feedback
+from state_codec import STRATEGY_IDS
+
+PROTOCOL_VERSION = 1
+
+SOURCES = ('opener', 'tree', 'book', 'endgame', 'search', 'cache', 'memo', 'degraded')
+
+# Response statuses, named by STATUS_NAMES in metrics.
+OK, OVERLOADED, EXPIRED, BAD_REQUEST, ERROR = range(5)
+STATUS_NAMES = ('ok', 'overloaded', 'expired', 'bad_request', 'error')
+
+DEFAULT_POOL_SIZE = 8
+DEFAULT_QUEUE_DEADLINE_MS = 2000
+DEFAULT_TIMEOUT_MS = 10000
+DEFAULT_RETRY_SECONDS = 5.0
+
+_LENGTH = struct.Struct('<H')
+_REQUEST = struct.Struct('<BBIIB')
+_ENTRY = struct.Struct('<HB')
+_RESPONSE = struct.Struct('<BBHIIBII')
+
+
+def encode_request(strategy, history, budget_ms=None, deadline_ms=None):
+    """Framed request for the next guess after 'history' (a list of {guess, bulls, cows})."""
+    parts = [_REQUEST.pack(
+        PROTOCOL_VERSION, STRATEGY_IDS.index(strategy), budget_ms or 0, deadline_ms or 0, len(history),
+    )]
+    for entry in history:
+        parts.append(_ENTRY.pack(as_index(entry['guess']), encode_feedback(entry['bulls'], entry['cows'])))
+    payload = b''.join(parts)
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def decode_request(payload):
+    """Inverse of encode_request() on the payload: (strategy, history, budget_ms, deadline_ms). Raises ValueError."""
+    try:
+        version, strategy_id, budget_ms, deadline_ms, n = _REQUEST.unpack_from(payload)
+        if version != PROTOCOL_VERSION or len(payload) != _REQUEST.size + n * _ENTRY.size:
+            raise ValueError('Unsupported solver request.')
+        history = []
+        for i in range(n):
+            guess, fb = _ENTRY.unpack_from(payload, _REQUEST.size + i * _ENTRY.size)
+            bulls, cows = decode_feedback(fb)
+            if guess >= NUM_CODES or bulls + cows > 4:
+                raise ValueError('Invalid history entry.')
+            history.append({'guess': guess, 'bulls': bulls, 'cows': cows})
+        return STRATEGY_IDS[strategy_id], history, budget_ms or None, deadline_ms or None
+    except (struct.error, IndexError) as exc:
+        raise ValueError('Malformed solver request.') from exc
+
+
+def encode_response(status, result=None):
+    """Framed response; 'result' is an ai_solver.SearchResult when status is OK."""
+    if result is None:
+        payload = _RESPONSE.pack(status, 0, 0, 0, 0, 0, 0, 0)
+    else:
+        payload = _RESPONSE.pack(
+            status, SOURCES.index(result.source), result.guess, result.evaluated,
+            result.pool_size, result.complete, result.pruned, result.skipped,
+        )
+    return _LENGTH.pack(len(payload)) + payload
+
+
+def decode_response(payload):
+    """
+    (status, fields) from a response payload; fields are the SearchResult
+    fields (guess, source, evaluated, pool_size, complete, pruned, skipped).
+    """
+    status, source, guess, evaluated, pool_size, complete, pruned, skipped = _RESPONSE.unpack(payload)
+    return status, (guess, SOURCES[source], evaluated, pool_size, bool(complete), pruned, skipped)
+
+
+def _recv_exactly(sock, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError('Solver connection closed.')
+        buf += chunk
+    return bytes(buf)
+
+
+def read_frame(sock):
+    """Payload of the next length-prefixed message on 'sock'."""
+    (size,) = _LENGTH.unpack(_recv_exactly(sock, _LENGTH.size))
+    return _recv_exactly(sock, size)
+
+
+class SolverClient:
+    """Thread-safe pool of connections to a solver daemon's Unix socket."""
+
+    def __init__(self, path, pool_size=DEFAULT_POOL_SIZE, queue_deadline_ms=DEFAULT_QUEUE_DEADLINE_MS,
+                 timeout_ms=DEFAULT_TIMEOUT_MS, retry_seconds=DEFAULT_RETRY_SECONDS):
+        self.path = path
+        self.pool_size = pool_size
+        self.queue_deadline_ms = queue_deadline_ms
+        self.timeout_ms = timeout_ms
+        self.retry_seconds = retry_seconds
+        self._idle = []
+        self._idle_pid = os.getpid()
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Client for SOLVER_SOCKET configured from the SOLVER_* variables, or None if unset."""
+        path = os.environ.get('SOLVER_SOCKET')
+        if not path:
+            return None
+        return cls(
+            path,
+            int(os.environ.get('SOLVER_POOL_SIZE', DEFAULT_POOL_SIZE)),
+            int(os.environ.get('SOLVER_QUEUE_DEADLINE_MS', DEFAULT_QUEUE_DEADLINE_MS)),
+            int(os.environ.get('SOLVER_TIMEOUT_MS', DEFAULT_TIMEOUT_MS)),
+            float(os.environ.get('SOLVER_RETRY_SECONDS', DEFAULT_RETRY_SECONDS)),
+        )
+
+    def _acquire(self, timeout):
+        """(socket, reused): an idle pooled connection, or a new one, with 'timeout' seconds set."""
+        with self._lock:
+            if self._idle_pid != os.getpid():
+                # Connections inherited from a forking parent are not ours to use.
+                self._idle, self._idle_pid = [], os.getpid()
+            sock = self._idle.pop() if self._idle else None
+        if sock is not None:
+            sock.settimeout(timeout)
+            return sock, True
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        return sock, False
+
+    def _release(self, sock):
+        with self._lock:
+            if len(self._idle) < self.pool_size and self._idle_pid == os.getpid():
+                self._idle.append(sock)
+                return
+        sock.close()
+
+    def search(self, history, strategy, budget_ms=None, deadline_ms=None):
+        """
+        SearchResult fields for the next guess from the daemon, or None
+        when the caller should search in-process instead. 'deadline_ms'
+        (the turn's remaining admission deadline, if any) shortens the queue
+        deadline, and with the search budget the wait for an answer.
+        """
+        if time.monotonic() < self._down_until:
+            metrics.SOLVER_DAEMON.inc('unavailable')
+            return None
+        queue_ms, timeout_ms = self.queue_deadline_ms, self.timeout_ms
+        if deadline_ms is not None:
+            # 0 means no deadline on the wire, so never send less than 1 ms.
+            queue_ms = max(1, min(queue_ms, deadline_ms))
+            timeout_ms = min(timeout_ms, queue_ms + (budget_ms or 0))
+        request = encode_request(strategy, history, budget_ms, queue_ms)
+        # A pooled connection may have been closed by a daemon restart; retry once on a fresh one.
+        for _ in range(2):
+            try:
+                sock, reused = self._acquire(timeout_ms / 1000)
+            except OSError as exc:
+                if isinstance(exc, (FileNotFoundError, ConnectionRefusedError)):
+                    self._down_until = time.monotonic() + self.retry_seconds
+                metrics.SOLVER_DAEMON.inc('unavailable')
+                return None
+            try:
+                sock.sendall(request)
+                payload = read_frame(sock)
+            except socket.timeout:
+                sock.close()
+                metrics.SOLVER_DAEMON.inc('timeout')
+                return None
+            except OSError:
+                sock.close()
+                if reused:
+                    continue
+                metrics.SOLVER_DAEMON.inc('error')
+                return None
+            self._release(sock)
+            status, fields = decode_response(payload)
+            metrics.SOLVER_DAEMON.inc(STATUS_NAMES[status])
+            return fields if status == OK else None
+        metrics.SOLVER_DAEMON.inc('error')
+        return None
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for sock in idle:
+            sock.close()
+
+
+CLIENT = SolverClient.from_env()
@@ -0,0 +1,121 @@
+"""
+solver_daemon.py - Standalone solver process serving guesses over a Unix socket.
+
+Runs AIBrainHard.choose_guess (decision tree, opening book, caches, then live
+search) for the web workers, speaking solver_client's protocol, so long
+scans never occupy a Flask request thread:
+
+    python solver_daemon.py [socket_path] [--slots N] [--max-queue N]
+    SOLVER_SOCKET=/path/to/socket gunicorn app:app
+
+Each connection gets a thread and may send any number of requests. At most
+'slots' searches run at once; a request waits for a slot until its queue
+deadline and is answered EXPIRED after that, and once 'max_queue' requests
+are already waiting, new ones are answered OVERLOADED straight away. Either
+way the client falls back to searching in-process. SIGTERM and SIGINT stop
+accepting connections and remove the socket.
+"""
+
+import argparse
+import os
+import signal
+import socketserver
+import threading
+import time
+
+import admission
+import preload
+import solver_client
+from ai_solver import AIBrainHard
+
+DEFAULT_SOCKET = os.environ.get('SOLVER_SOCKET', '/tmp/bulls_cows_solver.sock')
+DEFAULT_SLOTS = os.cpu_count() or 1
+DEFAULT_MAX_QUEUE = 64
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Answers requests on one client connection until it closes."""
+
+    def handle(self):
+        while True:
+            try:
+                payload = solver_client.read_frame(self.request)
+            except OSError:
+                return
+            self.request.sendall(self.server.answer(payload, time.monotonic()))
+
+
+class SolverDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix socket server running guess searches with bounded concurrency."""
+
+    daemon_threads = True
+    # Every web worker thread may connect at once.
+    request_queue_size = 256
+
+    def __init__(self, path, slots=DEFAULT_SLOTS, max_queue=DEFAULT_MAX_QUEUE):
+        if os.path.exists(path):
+            os.unlink(path)   # left behind by a daemon that did not shut down cleanly
+        super().__init__(path, _Handler)
+        os.chmod(path, 0o660)
+        self.path = path
+        self.gate = admission.SolverGate(slots, max_queue=max_queue)
+
+    def answer(self, payload, received):
+        """Framed response to one request payload received at time 'received'."""
+        try:
+            strategy, history, budget_ms, deadline_ms = solver_client.decode_request(payload)
+        except ValueError:
+            return solver_client.encode_response(solver_client.BAD_REQUEST)
+
+        timeout = None if deadline_ms is None else max(0.0, received + deadline_ms / 1000 - time.monotonic())
+        outcome = self.gate.acquire(timeout)
+        if outcome == 'overloaded':
+            return solver_client.encode_response(solver_client.OVERLOADED)
+        if outcome == 'expired':
+            return solver_client.encode_response(solver_client.EXPIRED)
+        try:
+            state = {'guessed': history, 'current_guess': None, 'strategy': strategy}
+            result = AIBrainHard.choose_guess(state, budget_ms)
+        except Exception:
+            return solver_client.encode_response(solver_client.ERROR)
+        finally:
+            self.gate.release()
+        return solver_client.encode_response(solver_client.OK, result)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def serve(path=DEFAULT_SOCKET, slots=DEFAULT_SLOTS, max_queue=DEFAULT_MAX_QUEUE):
+    """Load the solver tables and serve on 'path' until SIGTERM or SIGINT."""
+    # This process is the solver: it must never forward searches to itself,
+    # and its own gate (not admission.GATE) bounds concurrent searches.
+    solver_client.CLIENT = None
+    admission.GATE = None
+    preload.warm(freeze=False)
+    server = SolverDaemon(path, slots, max_queue)
+
+    def stop(signum, frame):
+        threading.Thread(target=server.shutdown).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    print(f'[solver] serving on {path} with {slots} slots', flush=True)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+    stats = server.gate.stats()
+    print(f'[solver] stopped after {stats["admitted"] + stats["queued"]} searches '
+          f'({stats["expired"]} expired, {stats["overloaded"]} overloaded)', flush=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve AI guesses over a Unix socket.')
+    parser.add_argument('socket', nargs='?', default=DEFAULT_SOCKET, help='socket path (default: $SOLVER_SOCKET)')
+    parser.add_argument('--slots', type=int, default=DEFAULT_SLOTS, help='searches run at once')
+    parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_QUEUE, help='requests waiting for a slot')
+    args = parser.parse_args()
+    serve(args.socket, args.slots, args.max_queue)
@@ -0,0 +1,156 @@
+"""
+speculation.py - Background computation of the AI's next guess.
+
+Once the human's feedback for an AI guess has been applied, the AI's next
+guess is fully determined, yet it used to be computed only when the client
+asked for it with /ai-turn. A Speculator starts that search on a small
+thread pool as soon as the feedback arrives, keyed by game ID; /ai-turn then
+takes the finished result, or waits on the search still running.
+
+A result is only used for the exact state it was computed from (same
+strategy, history and time budget); anything else is recomputed inline.
+Bounds for abandoned games:
+- at most max_games games hold a speculation; the oldest is cancelled and
+  dropped beyond that
+- results not collected within ttl seconds are dropped
+- a new speculation for a game, /start and /reset cancel the previous one
+A search still queued for a worker when /ai-turn arrives is cancelled and
+run inline instead of waited on, and one still running is waited on only
+until the turn's admission deadline (see admission). Running searches cannot
+be interrupted; their results are simply dropped.
+
+Outcomes are counted in metrics.SPECULATION. Configure with SPECULATION_WORKERS
+(0 disables), SPECULATION_MAX_GAMES and SPECULATION_TTL_SECONDS.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+from ai_solver import AIBrainHard
+from code_space import as_index
+from strategies import DEFAULT_STRATEGY
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_GAMES = 1000
+DEFAULT_TTL_SECONDS = 600
+
+
+def speculation_key(state, budget_ms=None):
+    """What a speculated guess depends on: strategy, history and time budget."""
+    history = tuple(
+        (as_index(e['guess']), e['bulls'], e['cows']) for e in state.get('guessed', [])
+    )
+    return state.get('strategy', DEFAULT_STRATEGY), history, budget_ms or None
+
+
+class Speculator:
+    """Per-process pool of background next-guess searches, keyed by game ID."""
+
+    def __init__(self, workers=DEFAULT_WORKERS, max_games=DEFAULT_MAX_GAMES, ttl=DEFAULT_TTL_SECONDS):
+        self.workers = workers
+        self.max_games = max_games
+        self.ttl = ttl
+        self._pending = OrderedDict()   # game_id -> (key, future, submitted_at), oldest first
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+
+    @classmethod
+    def from_env(cls, default_workers=DEFAULT_WORKERS):
+        """Speculator configured from the SPECULATION_* environment variables."""
+        return cls(
+            int(os.environ.get('SPECULATION_WORKERS', default_workers)),
+            int(os.environ.get('SPECULATION_MAX_GAMES', DEFAULT_MAX_GAMES)),
+            float(os.environ.get('SPECULATION_TTL_SECONDS', DEFAULT_TTL_SECONDS)),
+        )
+
+    @property
+    def enabled(self):
+        return self.workers > 0
+
+    def _get_executor(self):
+        """The thread pool, created on first use in each (possibly forked) process."""
+        if self._executor is None or self._executor_pid != os.getpid():
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='speculation')
+            self._executor_pid = os.getpid()
+            self._pending.clear()
+        return self._executor
+
+    def submit(self, game_id, state, budget_ms=None):
+        """Start searching for the next guess from 'state' in the background."""
+        if not self.enabled or not game_id:
+            return
+        snapshot = dict(state, guessed=list(state.get('guessed', [])))
+        # Background searches wait for a solver slot rather than degrade.
+        future = self._get_executor().submit(AIBrainHard.choose_guess, snapshot, budget_ms or None, False)
+        now = time.monotonic()
+        with self._lock:
+            previous = self._pending.pop(game_id, None)
+            if previous is not None:
+                previous[1].cancel()
+                metrics.SPECULATION.inc('replaced')
+            self._pending[game_id] = (speculation_key(state, budget_ms), future, now)
+            self._evict(now)
+
+    def _evict(self, now):
+        """Drop expired entries and the oldest beyond max_games. Caller holds the lock."""
+        while self._pending:
+            game_id, (_, future, submitted_at) = next(iter(self._pending.items()))
+            if submitted_at + self.ttl >= now and len(self._pending) <= self.max_games:
+                break
+            del self._pending[game_id]
+            future.cancel()
+            metrics.SPECULATION.inc('expired' if submitted_at + self.ttl < now else 'evicted')
+
+    def take(self, game_id, state, budget_ms=None, timeout=None):
+        """
+        The speculated SearchResult for this game's current 'state', waiting
+        for it at most 'timeout' seconds (None: until done) if the search is
+        running, or None when there is nothing usable.
+        """
+        if not self.enabled or not game_id:
+            return None
+        with self._lock:
+            entry = self._pending.pop(game_id, None)
+        if entry is None:
+            metrics.SPECULATION.inc('miss')
+            return None
+
+        key, future, submitted_at = entry
+        if key != speculation_key(state, budget_ms) or submitted_at + self.ttl < time.monotonic():
+            future.cancel()
+            metrics.SPECULATION.inc('stale')
+            return None
+        if future.done():
+            metrics.SPECULATION.inc('hit')
+        elif future.cancel():
+            # Still queued behind other games: cheaper to search inline now.
+            metrics.SPECULATION.inc('queued')
+            return None
+        else:
+            metrics.SPECULATION.inc('waited')
+        from concurrent.futures import TimeoutError as FutureTimeoutError
+
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            # Most likely waiting for a solver slot; the turn searches (or degrades) inline.
+            metrics.SPECULATION.inc('timeout')
+            return None
+        except Exception:
+            return None
+
+    def discard(self, game_id):
+        """Cancel and forget any speculation for 'game_id'."""
+        with self._lock:
+            entry = self._pending.pop(game_id, None)
+        if entry is not None:
+            entry[1].cancel()
+
+    def __len__(self):
+        return len(self._pending)
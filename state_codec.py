@@ -0,0 +1,205 @@
+"""
+state_codec.py - Versioned compact binary encoding of a game's session state.
+
+A game (AI secret, both guess histories, turn, winner and AI solver state)
+packs into a few dozen bytes: every guess is a uint16 code index plus one
+feedback byte (bulls * 5 + cows). The AI's history is stored once: the
+solver's 'guessed' list and candidate bitset are rebuilt from 'ai_guesses'
+on decode rather than duplicated.
+
+Layout (version 2, integers little-endian):
+    magic 0xBC, version
+    uint16 ai_secret, uint8 flags (game_over, turn, winner), uint8 strategy
+    uint16 pending AI guess
+    uint8 n + n bytes   game_id (hex string stored as raw bytes; n = 0 if absent)
+    uint8 n + n * (uint16 guess, uint8 feedback)   human_guesses
+    uint8 n + n * (uint16 guess, uint8 feedback)   ai_guesses
+    remaining bytes: JSON object of any other session keys (may be empty)
+A missing code (None, or the '????' placeholder older sessions stored for
+feedback given before the AI guessed) is stored as 0xFFFF. Version 1 is the
+same without the game_id field, and is still decoded.
+
+decode() also accepts the dict-based JSON format written before this codec,
+so existing sessions keep working. States the layout cannot represent make
+encode() raise ValueError; SessionSerializer then falls back to JSON.
+"""
+
+import base64
+import json
+import struct
+
+import candidate_sets
+from code_space import as_index
+from feedback_table import decode_feedback, encode_feedback
+from strategies import DEFAULT_STRATEGY
+
+MAGIC = 0xBC
+VERSION = 2
+
+# Stable wire IDs: append only, never reorder.
+STRATEGY_IDS = ('minimax', 'expected-size', 'entropy', 'most-parts')
+TURNS = (None, 'human', 'ai')
+WINNERS = (None, 'human', 'ai')
+
+NO_CODE = 0xFFFF
+MISSING_CODES = (None, '????')
+
+_HEADER = struct.Struct('<BBHBBH')
+_ENTRY = struct.Struct('<HB')
+
+_CORE_KEYS = ('ai_secret', 'ai_state', 'human_guesses', 'ai_guesses', 'game_over', 'winner', 'turn')
+
+
+def _code(value):
+    return NO_CODE if value in MISSING_CODES else as_index(value)
+
+
+def _uncode(value):
+    return None if value == NO_CODE else value
+
+
+def _pack_game_id(game_id):
+    """Raw bytes of a hex game ID, or b'' when it is absent or not plain hex."""
+    if not isinstance(game_id, str) or len(game_id) % 2 or len(game_id) > 510:
+        return b''
+    try:
+        return bytes.fromhex(game_id)
+    except ValueError:
+        return b''
+
+
+def _pack_history(entries):
+    if len(entries) > 255:
+        raise ValueError('History too long for compact encoding.')
+    out = bytearray([len(entries)])
+    for entry in entries:
+        out += _ENTRY.pack(_code(entry['guess']), encode_feedback(entry['bulls'], entry['cows']))
+    return out
+
+
+def _unpack_history(data, offset):
+    count = data[offset]
+    offset += 1
+    entries = []
+    for _ in range(count):
+        guess, fb = _ENTRY.unpack_from(data, offset)
+        offset += _ENTRY.size
+        bulls, cows = decode_feedback(fb)
+        entries.append({'guess': _uncode(guess), 'bulls': bulls, 'cows': cows})
+    return entries, offset
+
+
+def encode(state):
+    """Pack a session state dict into bytes. Raises ValueError if it does not fit the layout."""
+    if 'ai_secret' not in state:
+        raise ValueError('Not a game state.')
+    ai_state = state.get('ai_state') or {}
+    ai_guesses = state.get('ai_guesses', [])
+
+    # The solver history must be exactly the AI guesses that had a real code.
+    derived = [
+        {'guess': as_index(e['guess']), 'bulls': e['bulls'], 'cows': e['cows']}
+        for e in ai_guesses if e['guess'] not in MISSING_CODES
+    ]
+    guessed = [
+        {'guess': as_index(e['guess']), 'bulls': e['bulls'], 'cows': e['cows']}
+        for e in ai_state.get('guessed', [])
+    ]
+    if guessed != derived:
+        raise ValueError('AI history and solver state disagree.')
+
+    strategy = ai_state.get('strategy', DEFAULT_STRATEGY)
+    if strategy not in STRATEGY_IDS or state.get('turn') not in TURNS or state.get('winner') not in WINNERS:
+        raise ValueError('Value outside the compact encoding.')
+
+    flags = (
+        (1 if state.get('game_over') else 0)
+        | TURNS.index(state.get('turn')) << 1
+        | WINNERS.index(state.get('winner')) << 3
+    )
+    out = bytearray(_HEADER.pack(
+        MAGIC, VERSION, _code(state['ai_secret']), flags,
+        STRATEGY_IDS.index(strategy), _code(ai_state.get('current_guess')),
+    ))
+    game_id = _pack_game_id(state.get('game_id'))
+    out += bytes([len(game_id)]) + game_id
+    out += _pack_history(state.get('human_guesses', []))
+    out += _pack_history(ai_guesses)
+
+    core_keys = _CORE_KEYS + ('game_id',) if game_id else _CORE_KEYS
+    extra = {k: v for k, v in state.items() if k not in core_keys}
+    if extra:
+        out += json.dumps(extra, separators=(',', ':')).encode('utf-8')
+    return bytes(out)
+
+
+def decode(data):
+    """Unpack bytes from encode(), or a legacy JSON session, into a state dict."""
+    if not data or data[0] != MAGIC:
+        return json.loads(data)
+    magic, version, secret, flags, strategy, pending = _HEADER.unpack_from(data, 0)
+    if version not in (1, VERSION):
+        raise ValueError(f'Unsupported game state version {version}.')
+
+    offset = _HEADER.size
+    game_id = None
+    if version >= 2:
+        length = data[offset]
+        if length:
+            game_id = data[offset + 1:offset + 1 + length].hex()
+        offset += 1 + length
+    human_guesses, offset = _unpack_history(data, offset)
+    ai_guesses, offset = _unpack_history(data, offset)
+    guessed = [dict(e) for e in ai_guesses if e['guess'] is not None]
+
+    state = json.loads(data[offset:]) if offset < len(data) else {}
+    if game_id is not None:
+        state['game_id'] = game_id
+    state.update({
+        'ai_secret': _uncode(secret),
+        'ai_state': {
+            'guessed': guessed,
+            'current_guess': _uncode(pending),
+            'candidates': candidate_sets.encode(candidate_sets.from_history(guessed)),
+            'strategy': STRATEGY_IDS[strategy],
+        },
+        'human_guesses': human_guesses,
+        'ai_guesses': ai_guesses,
+        'game_over': bool(flags & 1),
+        'turn': TURNS[flags >> 1 & 3],
+        'winner': WINNERS[flags >> 3 & 3],
+    })
+    return state
+
+
+def to_log_string(state):
+    """Compact printable form of a game state for log lines."""
+    try:
+        return 'bc1:' + base64.urlsafe_b64encode(encode(dict(state))).decode('ascii')
+    except ValueError:
+        return json.dumps(dict(state), separators=(',', ':'))
+
+
+class SessionSerializer:
+    """
+    Serializer for Flask's signed-cookie sessions: compact binary when the
+    state fits, Flask's tagged JSON otherwise (and for reading old cookies).
+    """
+
+    def __init__(self):
+        from flask.json.tag import TaggedJSONSerializer
+
+        self._fallback = TaggedJSONSerializer()
+
+    def dumps(self, value):
+        try:
+            return encode(value)
+        except ValueError:
+            return self._fallback.dumps(value).encode('utf-8')
+
+    def loads(self, value):
+        if value and value[0] == MAGIC:
+            return decode(value)
+        if isinstance(value, bytes):
+            value = value.decode('utf-8')
+        return self._fallback.loads(value)
@@ -185,6 +185,13 @@ async function quickStartGame() {
 // GAME PAGE: TURN MANAGEMENT
 // ─────────────────────────────────────────────
 
+/**
+ * Feedback for the AI's last guess, held until the human's next guess so
+ * both travel in one POST /turn (which also returns the AI's next guess).
+ * A winning feedback is still sent right away via /ai-feedback.
+ */
+let pendingFeedback = null;
+
 function showHumanTurn() {
   show('humanCard');
   hide('resultFlash');
@@ -206,18 +213,30 @@ async function submitHumanGuess() {
   setButtonLoading(btn, true);
 
   try {
-    const res = await fetch('/human-turn', {
+    const body = pendingFeedback ? { guess, feedback: pendingFeedback } : { guess };
+    const res = await fetch('/turn', {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ guess }),
+      body: JSON.stringify(body),
     });
 
     const data = await res.json();
 
     if (!data.success) {
+      if (data.feedback_error) {
+        // The server kept nothing: take the feedback for the AI's guess again.
+        pendingFeedback = null;
+        const aiRows = document.getElementById('aiHistory');
+        if (aiRows && aiRows.lastElementChild) aiRows.lastElementChild.remove();
+        hide('humanCard');
+        show('aiCard');
+        showError('aiError', data.error);
+        return;
+      }
       showError('humanError', data.error || 'Invalid guess.');
       return;
     }
+    pendingFeedback = null;
 
     // Record in history
     addHistoryRow('humanHistory', guess, data.bulls, data.cows);
@@ -233,10 +252,10 @@ async function submitHumanGuess() {
       return;
     }
 
-    // After 2.5s switch to AI turn
+    // After 2.5s switch to AI turn (its guess came with this response)
     setTimeout(() => {
       hide('resultFlash');
-      triggerAiTurn();
+      displayAiGuess(data.ai_guess);
     }, 2500);
 
   } catch (err) {
@@ -272,22 +291,6 @@ function showResultFlash(guess, bulls, cows) {
 // AI TURN
 // ─────────────────────────────────────────────
 
-async function triggerAiTurn() {
-  try {
-    const res = await fetch('/ai-turn');
-    const data = await res.json();
-
-    if (!data.success) {
-      alert('AI error: ' + (data.error || 'Unknown'));
-      return;
-    }
-
-    displayAiGuess(data.ai_guess);
-  } catch (err) {
-    alert('Network error during AI turn.');
-  }
-}
-
 function displayAiGuess(guess) {
   // Animate digits appearing one by one
   const display = document.getElementById('aiGuessDisplay');
@@ -328,6 +331,21 @@ async function submitAiFeedback() {
     return;
   }
 
+  // Get guess from display for history
+  const aiDisplay = document.getElementById('aiGuessDisplay');
+  const guess = (aiDisplay ? aiDisplay.textContent : '????').replace(/\s/g, '');
+
+  if (bulls !== 4) {
+    // Sent along with the human's next guess.
+    pendingFeedback = { bulls, cows };
+    addHistoryRow('aiHistory', guess, bulls, cows);
+    document.getElementById('aiBulls').value = '0';
+    document.getElementById('aiCows').value  = '0';
+    hide('aiCard');
+    setTimeout(showHumanTurn, 300);
+    return;
+  }
+
   const btn = document.getElementById('btnAiFeedback');
   setButtonLoading(btn, true);
 
@@ -345,28 +363,16 @@ async function submitAiFeedback() {
       return;
     }
 
-    // Get guess from display for history
-    const aiDisplay = document.getElementById('aiGuessDisplay');
-    const guess = (aiDisplay ? aiDisplay.textContent : '????').replace(/\s/g, '');
     addHistoryRow('aiHistory', guess, bulls, cows);
 
     // Reset selects
     document.getElementById('aiBulls').value = '0';
     document.getElementById('aiCows').value  = '0';
 
-    if (data.won) {
-      hide('aiCard');
-      // Reveal AI's fixed secret only when AI wins, as requested.
-      const aiDisplay = document.getElementById('aiGuessDisplay');
-      const fallback = aiDisplay ? aiDisplay.textContent.replace(/\s/g, '') : '????';
-      const revealed = data.ai_secret || fallback;
-      setTimeout(() => showWinner('ai', revealed), 400);
-      return;
-    }
-
-    // Switch back to human turn
     hide('aiCard');
-    setTimeout(showHumanTurn, 300);
+    // Reveal AI's fixed secret only when AI wins, as requested.
+    const revealed = data.ai_secret || guess;
+    setTimeout(() => showWinner('ai', revealed), 400);
 
   } catch (err) {
     showError('aiError', 'Network error. Please try again.');
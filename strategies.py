@@ -0,0 +1,81 @@
+"""
+strategies.py - Guess-selection strategies for the hard-mode AI.
+
+Every strategy scores a guess from its partition histogram: the number of
+candidates falling into each feedback class (bulls * 5 + cows). The solver
+builds that histogram once per guess and hands it to the selected strategy,
+so switching strategy never costs an extra pass over the candidates.
+
+Each strategy provides two equivalent scorers, lower is better:
+- score(hist)       for one histogram (a list of counts), pure Python
+- score_rows(sizes) for a 2-D NumPy array with one histogram per row
+
+Ties are broken by the solver: candidate guesses first, then eval-pool order.
+"""
+
+import math
+from collections import namedtuple
+
+Strategy = namedtuple('Strategy', ['name', 'description', 'score', 'score_rows'])
+
+DEFAULT_STRATEGY = 'minimax'
+
+# Entropy scores are rounded so both backends compare equal on ties.
+_ENTROPY_DIGITS = 9
+
+STRATEGIES = {}
+
+
+def register(strategy):
+    """Add a strategy to the registry. Returns it unchanged."""
+    STRATEGIES[strategy.name] = strategy
+    return strategy
+
+
+def get_strategy(name):
+    """Look up a strategy by name. Raises KeyError for unknown names."""
+    return STRATEGIES[name or DEFAULT_STRATEGY]
+
+
+def _n_log_n(n):
+    return n * math.log2(n) if n > 1 else 0.0
+
+
+def _entropy_score(hist):
+    return round(sum(_n_log_n(n) for n in hist), _ENTROPY_DIGITS)
+
+
+def _entropy_score_rows(sizes):
+    import numpy as np
+
+    safe = np.where(sizes > 1, sizes, 1)
+    return np.round((sizes * np.log2(safe)).sum(axis=1), _ENTROPY_DIGITS)
+
+
+register(Strategy(
+    'minimax',
+    'Minimize the largest partition (worst case).',
+    lambda hist: max(hist),
+    lambda sizes: sizes.max(axis=1),
+))
+
+register(Strategy(
+    'expected-size',
+    'Minimize the expected size of the remaining candidate set.',
+    lambda hist: sum(n * n for n in hist),
+    lambda sizes: (sizes * sizes).sum(axis=1),
+))
+
+register(Strategy(
+    'entropy',
+    'Maximize the information gained (minimize sum of n*log2(n)).',
+    _entropy_score,
+    _entropy_score_rows,
+))
+
+register(Strategy(
+    'most-parts',
+    'Maximize the number of non-empty partitions.',
+    lambda hist: -sum(1 for n in hist if n),
+    lambda sizes: -(sizes > 0).sum(axis=1),
+))